@@ -35,7 +35,8 @@ class LoRaCommTester:
     def connect(self):
         """Connect to the specified serial port."""
         try:
-            self.serial_connection = serial.Serial(self.port, self.baud_rate, timeout=1)
+            # serial_for_url also accepts socket://localhost:PORT from telemetry_hub.py
+            self.serial_connection = serial.serial_for_url(self.port, self.baud_rate, timeout=1)
             print(f"Connected to {self.port}")
             return True
         except Exception as e:
@@ -3,13 +3,16 @@ Data Logging to Excel Script
 - Receives data from Teensy 4.1 via USB serial
 - Processes and formats the data
 - Creates and updates an Excel file
+  (rows go to an append-only log; the workbook is rewritten on a background
+  thread on a timer, at shutdown, and rolls to a new part file every N rows)
 """
 import serial
 import time
 import json
 import os
 import sys
-import pandas as pd
+import threading
+from openpyxl import Workbook, load_workbook
 from datetime import datetime
 import argparse
 
@@ -26,7 +29,8 @@ def setup_serial(port, baud_rate=115200, timeout=1):
         Serial object if successful, None otherwise
     """
     try:
-        ser = serial.Serial(port, baud_rate, timeout=timeout)
+        # A socket://localhost:7001 URL attaches to telemetry_hub.py instead of the port
+        ser = serial.serial_for_url(port, baud_rate, timeout=timeout)
         print(f"Connected to {port} at {baud_rate} baud")
         return ser
     except Exception as e:
@@ -142,6 +146,13 @@ def process_data(data):
         processed['t40_light_raw'] = data['t40_light']
         processed['t40_light_percent'] = (data['t40_light'] / 65535) * 100
     
+    # LoRa link quality of the Teensy 4.0 packet
+    if 't40_rssi' in data:
+        processed['t40_rssi_dbm'] = data['t40_rssi']
+    
+    if 't40_snr' in data:
+        processed['t40_snr_db'] = data['t40_snr']
+    
     # Process Teensy 4.1 data
     if 't41_temperature' in data:
         processed['t41_temperature_c'] = data['t41_temperature']
@@ -188,38 +199,158 @@ def process_data(data):
     
     return processed
 
-def update_excel(data, excel_file):
+class ExcelAppendLog:
     """
-    Update Excel file with new data
-    
-    Args:
-        data: Processed data dictionary
-        excel_file: Path to Excel file
-        
-    Returns:
-        True if successful, False otherwise
+    Constant-cost-per-row Excel logging
+
+    Each row is appended to a JSON-lines log next to the workbook. The
+    current workbook part is rebuilt from memory with openpyxl's write-only
+    (streaming) writer every flush_interval seconds and on close(); after
+    rows_per_part rows a new part (sensor_data_part2.xlsx, ...) is started,
+    so a rebuild never covers more than rows_per_part rows.
+
+    Rebuilds run on a writer thread from a snapshot of the part's rows, so
+    append() never waits for openpyxl. Requests for a part that is still
+    queued are merged into one rebuild of the latest rows.
     """
-    try:
-        # Convert data to DataFrame
-        df_new = pd.DataFrame([data])
-        
-        # Check if file exists
-        if os.path.exists(excel_file):
-            # Read existing data
-            df_existing = pd.read_excel(excel_file)
-            
-            # Append new data
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        else:
-            df_combined = df_new
-        
-        # Write to Excel file
-        df_combined.to_excel(excel_file, index=False)
-        print(f"Data saved to {excel_file}")
-        return True
-    except Exception as e:
-        print(f"Error updating Excel file: {e}")
-        return False
+
+    def __init__(self, excel_file, flush_interval=30.0, rows_per_part=50000):
+        """
+        Args:
+            excel_file: Path of the first workbook part
+            flush_interval: Seconds between workbook rebuilds (0 = only at close/roll)
+            rows_per_part: Rows per workbook part before rolling to the next
+        """
+        self.excel_file = excel_file
+        self.base, self.ext = os.path.splitext(excel_file)
+        self.log_path = self.base + '.jsonl'
+        self.flush_interval = flush_interval
+        self.rows_per_part = rows_per_part
+        self.part = 1
+        self.rows = []
+        self.columns = {}  # insertion-ordered set of column names
+        self.total_rows = 0
+        self.dirty = False
+        self.last_flush = time.monotonic()
+        self._jobs = {}  # part path -> (rows, columns) snapshot, oldest part first
+        self._condition = threading.Condition()
+        self._stopping = False
+
+        if not os.path.exists(self.log_path) and os.path.exists(excel_file):
+            self._seed_from_workbook()
+        self._resume()
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._writer = threading.Thread(target=self._run, name='excel-writer', daemon=True)
+        self._writer.start()
+
+    def _seed_from_workbook(self):
+        # Workbook from an older logger version: keep its rows by moving them into the log
+        workbook = load_workbook(self.excel_file, read_only=True)
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        with open(self.log_path, 'w', encoding='utf-8') as log:
+            if header:
+                for values in rows:
+                    row = {k: v for k, v in zip(header, values) if k is not None and v is not None}
+                    log.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        workbook.close()
+
+    def _resume(self):
+        # Rebuild the in-memory copy of the current part from an existing log
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                self._add(row, resuming=True)
+        # Rows logged after the last rebuild (e.g. before a crash) are not in the workbook yet
+        path = self.part_path()
+        if self.rows and (not os.path.exists(path)
+                          or os.path.getmtime(self.log_path) > os.path.getmtime(path)):
+            self.dirty = True
+
+    def _add(self, row, resuming=False):
+        self.rows.append(row)
+        for key in row:
+            self.columns.setdefault(key, None)
+        self.total_rows += 1
+        if len(self.rows) >= self.rows_per_part:
+            # Finished parts already on disk are not rewritten when resuming
+            if not resuming or not os.path.exists(self.part_path()):
+                self._write_part()
+            self.part += 1
+            self.rows = []
+            self.columns = {}
+
+    def part_path(self, part=None):
+        part = self.part if part is None else part
+        return self.excel_file if part == 1 else f"{self.base}_part{part}{self.ext}"
+
+    def append(self, data):
+        """
+        Log one processed row; rebuilds the workbook when the flush interval has passed
+
+        Args:
+            data: Processed data dictionary
+        """
+        self._log.write(json.dumps(data, ensure_ascii=False, default=str) + '\n')
+        self._log.flush()
+        self._add(data)
+        self.dirty = bool(self.rows)
+        if self.flush_interval and self.dirty and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Rebuild the current workbook part now."""
+        if self.rows:
+            self._write_part()
+        self.dirty = False
+        self.last_flush = time.monotonic()
+
+    def _write_part(self):
+        # Queue a rebuild of the current part; the row list is copied, not the rows
+        with self._condition:
+            self._jobs[self.part_path()] = (list(self.rows), list(self.columns))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopping:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                path = next(iter(self._jobs))
+                rows, columns = self._jobs.pop(path)
+            try:
+                self._save(path, rows, columns)
+            except Exception as e:
+                print(f"Error writing {path}: {e}")
+
+    def _save(self, path, rows, columns):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Data')
+        sheet.append(columns)
+        for row in rows:
+            sheet.append([row.get(column) for column in columns])
+        temp_path = path + '.tmp'
+        workbook.save(temp_path)
+        os.replace(temp_path, path)  # readers never see a half-written workbook
+        print(f"Data saved to {path} ({len(rows)} rows)")
+
+    def close(self):
+        """Queue the final rebuild, wait for the writer to finish and close the log."""
+        if self.dirty:
+            self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._writer.join()
+        self._log.close()
 
 def main():
     """Main function to run the data logging script"""
@@ -229,6 +360,8 @@ def main():
     parser.add_argument('--baud', type=int, default=115200, help='Baud rate (default: 115200)')
     parser.add_argument('--output', type=str, default='sensor_data.xlsx', help='Output Excel file (default: sensor_data.xlsx)')
     parser.add_argument('--interval', type=float, default=0, help='Logging interval in seconds (default: 0, log as fast as possible)')
+    parser.add_argument('--excel-interval', type=float, default=30.0, help='Seconds between workbook rebuilds (default: 30)')
+    parser.add_argument('--rows-per-part', type=int, default=50000, help='Rows per workbook file before rolling to a new part (default: 50000)')
     args = parser.parse_args()
     
     # Set up serial connection
@@ -236,7 +369,8 @@ def main():
     if not ser:
         sys.exit(1)
     
-    print(f"Logging data to {args.output} (Press Ctrl+C to stop)")
+    excel_log = ExcelAppendLog(args.output, args.excel_interval, args.rows_per_part)
+    print(f"Logging data to {args.output} via {excel_log.log_path} (Press Ctrl+C to stop)")
     
     try:
         while True:
@@ -246,8 +380,8 @@ def main():
                 # Process data
                 processed_data = process_data(data)
                 
-                # Update Excel file
-                update_excel(processed_data, args.output)
+                # Append to the log (the workbook is rebuilt on a timer)
+                excel_log.append(processed_data)
             
             # Wait for the specified interval
             if args.interval > 0:
@@ -257,6 +391,7 @@ def main():
     except Exception as e:
         print(f"Error: {e}")
     finally:
+        excel_log.close()
         if ser:
             ser.close()
             print("Serial connection closed")
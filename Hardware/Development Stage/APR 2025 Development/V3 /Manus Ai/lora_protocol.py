@@ -3,17 +3,254 @@ LoRa Communication Protocol Implementation
 - Defines packet structure for Teensy 4.0 to Teensy 4.1 communication
 - Implements error checking and reliable transmission
 - Handles acknowledgment and retransmission
+- Stop-and-wait (window_size=1) or sliding-window selective repeat with
+  cumulative + selective ACK bitmaps and 16-bit sequence numbers
+- AT commands return as soon as the module answers +OK / +ERR=n; +RCV lines
+  that arrive meanwhile are kept in the inbound queue instead of discarded
+- Streaming +RCV parser: the payload is sliced by its length field, so it may
+  contain commas, several frames per read are all kept, partial frames wait
+  for the next read, and every frame carries its RSSI and SNR
+
+Windowed mode (both ends must use the same window_size):
+- send_packet() returns as soon as the packet is in the window; call
+  service() regularly to process ACKs and retransmit expired packets
+- The receiver answers with SACK|<cumulative>|<bitmap>, where the cumulative
+  ACK is the last in-order sequence number and bit i of the hex bitmap marks
+  sequence number cumulative+2+i as received
+- Packets are delivered as they arrive (telemetry carries its own timestamps);
+  a packet the sender gave up on is skipped once the window moves past it
+
+Retransmission instead of forward error correction:
+- Both RYLR998 ends run this class and can talk back, so a lost packet
+  costs one resend instead of the fixed parity airtime (22% at K=8) that
+  Software/telemetry_fec.py adds to every packet
+- With window_size > 1 the ACK round trip overlaps the next packets, so
+  losses cost airtime but do not stall the stream
+- Software/ uses FEC because the DX-LR02 downlink there is one way: the
+  ground station never transmits, so nothing can be acknowledged
+
+Binary mode (binary=True, both ends must match):
+- Packets are COBS(seq | len | data | crc) instead of "seq|data|crc32" text:
+  6 bytes of overhead instead of up to 17, and any bytes may be sent
+- send_packet() takes bytes (str is UTF-8 encoded), receive_packet()
+  returns bytes
+- The RYLR998 takes the payload by its length field; COBS keeps zero bytes
+  out of the AT command
+
+Binary packet layout before COBS (little endian):
+    bytes 0-1   sequence number
+    byte  2     data length (0-234), or TYPE_ACK / TYPE_SACK
+    n bytes     data (ACK: none, SACK: 32-bit bitmap)
+    2 bytes     CRC-16/CCITT-FALSE over everything before it
 """
 import time
 import struct
 import binascii
+from array import array
+
+SEQ_MODULUS = 65536  # 16-bit sequence numbers
+POWER_UP_TIMEOUT = 2 # seconds the module may take to answer its first AT
+MAX_PAYLOAD = 240    # RYLR998 payload limit in bytes
+MAX_WINDOW = 32      # The SACK bitmap covers 32 packets past the cumulative ACK
+MAX_UNSOLICITED = 16 # Unclaimed response lines kept in LoRaProtocol.unsolicited
+
+# Binary mode: COBS code byte + sequence (2) + length (1) + CRC-16 (2)
+BINARY_OVERHEAD = 6
+MAX_BINARY_DATA = MAX_PAYLOAD - BINARY_OVERHEAD
+TYPE_ACK = 0xFE      # Length byte values above MAX_BINARY_DATA mark control packets
+TYPE_SACK = 0xFF
+
+
+def seq_diff(a, b):
+    """Signed distance from sequence number b to a, across wraparound"""
+    return (a - b + SEQ_MODULUS // 2) % SEQ_MODULUS - SEQ_MODULUS // 2
+
+
+def _make_crc_table():
+    table = array("H", [0] * 256)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table[i] = crc
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, start=0, end=None, crc=0xFFFF):
+    """Table driven CRC-16/CCITT-FALSE over data[start:end] without slicing"""
+    if end is None:
+        end = len(data)
+    table = _CRC_TABLE
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ data[i]) & 0xFF]
+    return crc
+
+
+def cobs_encode(data):
+    """
+    Consistent Overhead Byte Stuffing: remove every zero byte
+
+    Returns:
+        bytes with no zeros, one byte longer per started 254 bytes of data
+    """
+    out = bytearray(1)
+    code_pos = 0
+    code = 1
+    for byte in data:
+        if byte:
+            out.append(byte)
+            code += 1
+        if not byte or code == 0xFF:
+            out[code_pos] = code
+            code_pos = len(out)
+            out.append(0)
+            code = 1
+    out[code_pos] = code
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """
+    Undo cobs_encode()
+
+    Raises:
+        ValueError: If data is not valid COBS output
+    """
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        code = data[pos]
+        if code == 0 or pos + code > len(data):
+            raise ValueError("invalid COBS data")
+        out.extend(data[pos + 1:pos + code])
+        pos += code
+        if code < 0xFF and pos < len(data):
+            out.append(0)
+    return bytes(out)
+
+
+class RcvParser:
+    """
+    Streaming parser for the RYLR998 UART output
+    
+    Splits the byte stream into +RCV=<addr>,<len>,<data>,<rssi>,<snr> frames
+    and other (command response) lines. Bytes of an incomplete frame or line
+    are kept until the next feed().
+    """
+    
+    def __init__(self):
+        self.buffer = b""
+        self.frames = 0
+        self.malformed = 0
+        self._skip_line = False  # dropping the rest of a malformed line
+    
+    def feed(self, data):
+        """
+        Add received bytes
+        
+        Returns:
+            (frames, lines): frames as (source, payload bytes, rssi, snr)
+            tuples, lines as stripped strings
+        """
+        buf = self.buffer + data
+        frames = []
+        lines = []
+        pos = 0
+        
+        while pos < len(buf):
+            if self._skip_line:
+                end = buf.find(b"\n", pos)
+                if end < 0:
+                    pos = len(buf)
+                    break
+                pos = end + 1
+                self._skip_line = False
+                continue
+            
+            if buf[pos] in (10, 13):
+                pos += 1
+                continue
+            
+            if not buf[pos:pos + 5] == b"+RCV="[:len(buf) - pos]:
+                # Command response line
+                end = buf.find(b"\n", pos)
+                if end < 0:
+                    break
+                line = buf[pos:end].decode('utf-8', 'ignore').strip()
+                if line:
+                    lines.append(line)
+                pos = end + 1
+                continue
+            
+            frame = self._parse_frame(buf, pos)
+            if frame is None:
+                break  # incomplete, wait for more bytes
+            if frame is False:
+                # Drop the bad line and resynchronise after it
+                self.malformed += 1
+                self._skip_line = True
+                continue
+            
+            source, payload, rssi, snr, pos = frame
+            frames.append((source, payload, rssi, snr))
+            self.frames += 1
+        
+        self.buffer = buf[pos:]
+        return frames, lines
+    
+    def _parse_frame(self, buf, pos):
+        """
+        Parse one +RCV frame starting at pos
+        
+        Returns:
+            (source, payload, rssi, snr, next position), None if more bytes
+            are needed, or False if the frame is malformed
+        """
+        header_end = buf.find(b"\n", pos)
+        first = buf.find(b",", pos + 5)
+        second = buf.find(b",", first + 1) if first >= 0 else -1
+        if second < 0 or (header_end >= 0 and header_end < second):
+            if header_end >= 0 or len(buf) - pos > 20:
+                return False
+            return None
+        
+        try:
+            source = int(str(buf[pos + 5:first], 'ascii'))
+            length = int(str(buf[first + 1:second], 'ascii'))
+        except ValueError:
+            return False
+        if not 0 <= length <= MAX_PAYLOAD:
+            return False
+        
+        start = second + 1
+        end = start + length
+        if len(buf) <= end:
+            return None
+        if buf[end] != 44:  # ','
+            return False
+        
+        line_end = buf.find(b"\n", end)
+        if line_end < 0:
+            return None if len(buf) - end < 20 else False
+        try:
+            rssi, snr = str(buf[end + 1:line_end], 'ascii').strip().split(',')
+            return source, buf[start:end], int(rssi), int(snr), line_end + 1
+        except ValueError:
+            return False
+
 
 class LoRaProtocol:
     """
     A class to handle LoRa communication protocol between Teensy 4.0 and Teensy 4.1
     """
     
-    def __init__(self, uart, address, destination, debug=False):
+    def __init__(self, uart, address, destination, debug=False, window_size=1, binary=False):
         """
         Initialize the LoRa protocol handler
         
@@ -22,15 +259,48 @@ class LoRaProtocol:
             address: The address of this device
             destination: The address of the destination device
             debug: Enable debug output
+            window_size: Packets in flight (1 = stop-and-wait, up to MAX_WINDOW)
+            binary: Use compact COBS + CRC-16 packets carrying bytes
         """
         self.uart = uart
         self.address = address
         self.destination = destination
         self.debug = debug
+        self.binary = binary
         self.sequence_number = 0
         self.last_received_seq = -1
         self.retries = 3
-        self.timeout = 5  # seconds
+        self.timeout = 5  # seconds, also the per-packet retransmit timer in windowed mode
+        self.window_size = max(1, min(window_size, MAX_WINDOW))
+        
+        # Windowed sender: seq -> [packet, last send time, transmissions]
+        self._outstanding = {}
+        # Windowed receiver: lowest sequence number not yet received, and
+        # the sequence numbers received above it
+        self._rx_base = None
+        self._rx_received = set()
+        self._rx_unknown = 0
+        self._delivered = []
+        
+        # Received +RCV messages (source, data, rssi, snr) not yet consumed
+        self._parser = RcvParser()
+        self.inbound = []
+        # Response lines read but not yet claimed by an AT command, and the
+        # ones that arrived while no command was waiting (newest last)
+        self._lines = []
+        self.unsolicited = []
+        self.last_rssi = None  # dBm, of the last packet returned by receive_packet()
+        self.last_snr = None   # dB
+        
+        # Link statistics
+        self.packets_sent = 0
+        self.retransmissions = 0
+        self.packets_acked = 0
+        self.packets_failed = 0
+        self.packets_received = 0
+        self.duplicates = 0
+        self.packets_lost = 0
+        self.command_latency = 0.0  # seconds, last AT command
         
     def _log(self, message):
         """Print debug messages if debug is enabled"""
@@ -41,25 +311,90 @@ class LoRaProtocol:
         """
         Send AT command to the LoRa module and wait for response
         
+        Returns as soon as the final +OK or +ERR=n line arrives. +RCV lines
+        received while waiting go to the inbound queue; lines read after the
+        answer stay queued for the next reader, and lines that were already
+        waiting before the command go to unsolicited.
+        
         Args:
-            command: The AT command to send
-            wait_time: Time to wait for response in seconds
+            command: The AT command to send (str, or bytes for binary payloads)
+            wait_time: Longest time to wait for the response in seconds
             
         Returns:
-            The response string from the module
+            The response string from the module (empty on timeout)
         """
         self._log(f"Sending: {command}")
-        self.uart.write(f"{command}\r\n".encode())
-        time.sleep(wait_time)
+        # Anything already waiting cannot be the answer to this command
+        self._keep_unsolicited(self._poll_uart())
+        start_time = time.monotonic()
+        if isinstance(command, str):
+            command = command.encode()
+        self.uart.write(command + b"\r\n")
         
-        response = b""
-        while self.uart.in_waiting:
-            response += self.uart.read(self.uart.in_waiting)
+        response = []
+        done = False
+        while not done:
+            lines = self._poll_uart()
+            for i, line in enumerate(lines):
+                response.append(line)
+                if line.startswith("+OK") or line.startswith("+ERR"):
+                    # The rest of this read belongs to whoever reads next
+                    self._lines = lines[i + 1:]
+                    done = True
+                    break
+            if not done:
+                if time.monotonic() - start_time >= wait_time:
+                    self._log(f"No response to {command}")
+                    break
+                time.sleep(0.005)
         
-        response_str = response.decode('utf-8', 'ignore').strip()
-        self._log(f"Response: {response_str}")
+        self.command_latency = time.monotonic() - start_time
+        response_str = "\n".join(response)
+        self._log(f"Response ({self.command_latency * 1000:.0f} ms): {response_str}")
         return response_str
     
+    def _poll_uart(self):
+        """
+        Read whatever the module has sent
+        
+        Every complete +RCV frame goes to the inbound queue (payload as a
+        string, or as bytes in binary mode).
+        
+        Returns:
+            List of the other (command response) lines, starting with any
+            left over from the previous AT command
+        """
+        lines = self._lines
+        self._lines = []
+        while self.uart.in_waiting:
+            frames, new_lines = self._parser.feed(self.uart.read(self.uart.in_waiting))
+            lines.extend(new_lines)
+            for source, payload, rssi, snr in frames:
+                if not self.binary:
+                    payload = payload.decode('utf-8', 'ignore')
+                self.inbound.append((source, payload, rssi, snr))
+        return lines
+    
+    def _keep_unsolicited(self, lines):
+        """Record response lines no AT command was waiting for"""
+        for line in lines:
+            self._log(f"Unsolicited: {line}")
+        self.unsolicited.extend(lines)
+        del self.unsolicited[:-MAX_UNSOLICITED]
+    
+    def _send_payload(self, packet):
+        """
+        Hand one packet to the module with AT+SEND
+        
+        Returns:
+            The module's response string
+        """
+        if self.binary:
+            command = f"AT+SEND={self.destination},{len(packet)},".encode() + packet
+        else:
+            command = f"AT+SEND={self.destination},{len(packet)},{packet}"
+        return self.send_at_command(command)
+    
     def initialize(self, network_id, band, parameters):
         """
         Initialize the LoRa module with the specified settings
@@ -73,13 +408,13 @@ class LoRaProtocol:
             True if initialization was successful, False otherwise
         """
         self._log("Initializing LoRa module...")
-        time.sleep(1)  # Give the module time to power up
         
-        # Test AT command
-        response = self.send_at_command("AT")
-        if "+OK" not in response:
-            self._log("LoRa module not responding")
-            return False
+        # Test AT command, retried until the module has powered up
+        start_time = time.monotonic()
+        while "+OK" not in self.send_at_command("AT", wait_time=0.2):
+            if time.monotonic() - start_time >= POWER_UP_TIMEOUT:
+                self._log("LoRa module not responding")
+                return False
         
         # Configure LoRa module
         self.send_at_command(f"AT+ADDRESS={self.address}")
@@ -102,33 +437,106 @@ class LoRaProtocol:
         """
         return binascii.crc32(data.encode()) & 0xFFFFFFFF
     
+    def _encode_binary(self, seq_num, length_or_type, body):
+        """COBS-encoded binary packet: seq | length or type | body | CRC-16"""
+        frame = bytearray(struct.pack("<HB", seq_num, length_or_type))
+        frame.extend(body)
+        frame.extend(struct.pack("<H", crc16(frame)))
+        return cobs_encode(frame)
+    
+    def _make_packet(self, seq_num, data):
+        """Data packet in the configured framing"""
+        if self.binary:
+            return self._encode_binary(seq_num, len(data), data)
+        return f"{seq_num}|{data}|{self.calculate_crc(data)}"
+    
+    def _decode_packet(self, payload):
+        """
+        Split a received packet into its kind, sequence number and contents
+        
+        Returns:
+            ("DATA", seq, data), ("ACK", seq, None) or ("SACK", cumulative,
+            bitmap); None if the packet is malformed or fails its CRC
+        """
+        if self.binary:
+            return self._decode_binary(payload)
+        try:
+            if payload.startswith("ACK|"):
+                return "ACK", int(payload[4:]), None
+            if payload.startswith("SACK|"):
+                _, cumulative, bitmap = payload.split('|')
+                return "SACK", int(cumulative), int(bitmap, 16)
+            seq_text, rest = payload.split('|', 1)
+            data, crc_text = rest.rsplit('|', 1)
+            seq_num = int(seq_text)
+            received_crc = int(crc_text)
+        except ValueError:
+            return None
+        calculated_crc = self.calculate_crc(data)
+        if calculated_crc != received_crc:
+            self._log(f"CRC mismatch: {calculated_crc} != {received_crc}")
+            return None
+        return "DATA", seq_num, data
+    
+    def _decode_binary(self, payload):
+        """_decode_packet() for binary mode"""
+        try:
+            frame = cobs_decode(payload)
+        except ValueError:
+            return None
+        if len(frame) < 5:
+            return None
+        received_crc = frame[-2] | (frame[-1] << 8)
+        calculated_crc = crc16(frame, 0, len(frame) - 2)
+        if calculated_crc != received_crc:
+            self._log(f"CRC mismatch: {calculated_crc:04x} != {received_crc:04x}")
+            return None
+        seq_num, length_or_type = struct.unpack_from("<HB", frame)
+        body = frame[3:-2]
+        if length_or_type == TYPE_ACK and not body:
+            return "ACK", seq_num, None
+        if length_or_type == TYPE_SACK and len(body) == 4:
+            return "SACK", seq_num, struct.unpack("<I", body)[0]
+        if length_or_type == len(body):
+            return "DATA", seq_num, body
+        return None
+    
     def send_packet(self, data, with_ack=True):
         """
         Send a data packet with optional acknowledgment
         
         Args:
-            data: The data string to send
+            data: The data string to send (bytes or str in binary mode)
             with_ack: Whether to wait for acknowledgment
             
         Returns:
             True if the packet was sent and acknowledged (if with_ack=True),
-            False otherwise
+            False otherwise. In windowed mode True means the packet entered
+            the window; delivery is tracked by service().
+            
+        Raises:
+            ValueError: If binary data is longer than MAX_BINARY_DATA bytes
         """
-        # Increment sequence number
-        self.sequence_number = (self.sequence_number + 1) % 256
+        if self.binary:
+            if isinstance(data, str):
+                data = data.encode()
+            if len(data) > MAX_BINARY_DATA:
+                raise ValueError(f"packet data is {len(data)} bytes, limit is {MAX_BINARY_DATA}")
         
-        # Calculate CRC
-        crc = self.calculate_crc(data)
+        if with_ack and self.window_size > 1:
+            return self._send_windowed(data)
+        
+        # Increment sequence number
+        self.sequence_number = (self.sequence_number + 1) % SEQ_MODULUS
         
         # Create packet: SEQ|DATA|CRC
-        packet = f"{self.sequence_number}|{data}|{crc}"
+        packet = self._make_packet(self.sequence_number, data)
         
         # Send the packet
         for attempt in range(self.retries):
             self._log(f"Sending packet (attempt {attempt+1}/{self.retries}): {packet[:20]}...")
             
-            command = f"AT+SEND={self.destination},{len(packet)},{packet}"
-            response = self.send_at_command(command)
+            response = self._send_payload(packet)
             
             if "+OK" not in response:
                 self._log("Failed to send packet")
@@ -163,27 +571,23 @@ class LoRaProtocol:
         start_time = time.monotonic()
         
         while time.monotonic() - start_time < self.timeout:
-            if self.uart.in_waiting:
-                response = b""
-                while self.uart.in_waiting:
-                    response += self.uart.read(self.uart.in_waiting)
-                
-                response_str = response.decode('utf-8', 'ignore').strip()
-                self._log(f"Received: {response_str}")
-                
-                # Check if it's an ACK message
-                # Format: +RCV=source,length,ACK|seq_num,rssi,snr
-                if "+RCV=" in response_str and "ACK|" in response_str:
-                    try:
-                        parts = response_str.split(',')
-                        data_part = parts[2]
-                        ack_parts = data_part.split('|')
-                        if ack_parts[0] == "ACK" and int(ack_parts[1]) == seq_num:
-                            return True
-                    except Exception as e:
-                        self._log(f"Error parsing ACK: {e}")
+            self._keep_unsolicited(self._poll_uart())
+            
+            # Check for an ACK message; data packets stay queued for
+            # receive_packet() and corrupt ones are dropped
+            for message in list(self.inbound):
+                if message[0] != self.destination:
+                    continue
+                packet = self._decode_packet(message[1])
+                if packet is not None and packet[0] == "DATA":
+                    continue
+                self.inbound.remove(message)
+                if packet is not None and packet[0] == "ACK":
+                    self._log(f"Received ACK for sequence {packet[1]}")
+                    if packet[1] == seq_num:
+                        return True
             
-            time.sleep(0.1)
+            time.sleep(0.01)
         
         return False
     
@@ -195,67 +599,49 @@ class LoRaProtocol:
             timeout: Time to wait for a packet in seconds
             
         Returns:
-            The received data string, or None if no valid packet was received
+            The received data string (bytes in binary mode), or None if no
+            valid packet was received
         """
+        if self.window_size > 1:
+            return self._receive_windowed(timeout)
+        
         start_time = time.monotonic()
         
         while time.monotonic() - start_time < timeout:
-            if self.uart.in_waiting:
-                response = b""
-                while self.uart.in_waiting:
-                    response += self.uart.read(self.uart.in_waiting)
+            self._keep_unsolicited(self._poll_uart())
+            
+            while self.inbound:
+                source, data_part, rssi, snr = self.inbound.pop(0)
+                
+                # Only process packets from our expected source
+                if source != self.destination:
+                    continue
+                self._log(f"Received: {data_part}")
+                
+                # Check it is a data message and verify its CRC
+                packet = self._decode_packet(data_part)
+                if packet is None or packet[0] != "DATA":
+                    continue
+                _, seq_num, data = packet
                 
-                response_str = response.decode('utf-8', 'ignore').strip()
-                self._log(f"Received: {response_str}")
+                # Check for duplicate packet
+                if seq_num == self.last_received_seq:
+                    self._log(f"Duplicate packet received (seq={seq_num})")
+                    # Send ACK again
+                    self._send_ack(seq_num)
+                    continue
                 
-                # Check if it's a data message
-                # Format: +RCV=source,length,seq|data|crc,rssi,snr
-                if "+RCV=" in response_str and "|" in response_str:
-                    try:
-                        # Parse the received data
-                        parts = response_str.split(',')
-                        source = int(parts[0].split('=')[1])
-                        
-                        # Only process packets from our expected source
-                        if source != self.destination:
-                            continue
-                        
-                        # Extract the data portion
-                        data_part = parts[2]
-                        
-                        # Split into sequence, data, and CRC
-                        packet_parts = data_part.split('|', 2)
-                        if len(packet_parts) != 3:
-                            continue
-                        
-                        seq_num = int(packet_parts[0])
-                        data = packet_parts[1]
-                        received_crc = int(packet_parts[2])
-                        
-                        # Verify CRC
-                        calculated_crc = self.calculate_crc(data)
-                        if calculated_crc != received_crc:
-                            self._log(f"CRC mismatch: {calculated_crc} != {received_crc}")
-                            continue
-                        
-                        # Check for duplicate packet
-                        if seq_num == self.last_received_seq:
-                            self._log(f"Duplicate packet received (seq={seq_num})")
-                            # Send ACK again
-                            self._send_ack(seq_num)
-                            continue
-                        
-                        # Update last received sequence
-                        self.last_received_seq = seq_num
-                        
-                        # Send acknowledgment
-                        self._send_ack(seq_num)
-                        
-                        return data
-                    except Exception as e:
-                        self._log(f"Error parsing packet: {e}")
+                # Update last received sequence
+                self.last_received_seq = seq_num
+                
+                # Send acknowledgment
+                self._send_ack(seq_num)
+                
+                self.last_rssi = rssi
+                self.last_snr = snr
+                return data
             
-            time.sleep(0.1)
+            time.sleep(0.01)
         
         return None
     
@@ -266,7 +652,212 @@ class LoRaProtocol:
         Args:
             seq_num: The sequence number to acknowledge
         """
-        ack_packet = f"ACK|{seq_num}"
-        command = f"AT+SEND={self.destination},{len(ack_packet)},{ack_packet}"
-        self.send_at_command(command)
+        if self.binary:
+            ack_packet = self._encode_binary(seq_num, TYPE_ACK, b"")
+        else:
+            ack_packet = f"ACK|{seq_num}"
+        self._send_payload(ack_packet)
         self._log(f"Sent ACK for sequence {seq_num}")
+    
+    def _read_messages(self):
+        """
+        Take every queued +RCV message, reading the UART first
+        
+        Returns:
+            List of (source address, data, rssi, snr) tuples
+        """
+        self._keep_unsolicited(self._poll_uart())
+        messages = self.inbound
+        self.inbound = []
+        return messages
+    
+    def _window_open(self):
+        """True if the next sequence number fits in the send window"""
+        if not self._outstanding:
+            return True
+        next_seq = (self.sequence_number + 1) % SEQ_MODULUS
+        oldest = max(self._outstanding, key=lambda seq: seq_diff(next_seq, seq))
+        return seq_diff(next_seq, oldest) < self.window_size
+    
+    def _send_windowed(self, data):
+        """Queue a packet in the send window, waiting for room if it is full"""
+        deadline = time.monotonic() + self.timeout * (self.retries + 1)
+        while not self._window_open():
+            if time.monotonic() > deadline:
+                self._log("Send window stalled")
+                return False
+            self.service()
+            time.sleep(0.01)
+        
+        self.sequence_number = (self.sequence_number + 1) % SEQ_MODULUS
+        packet = self._make_packet(self.sequence_number, data)
+        self._outstanding[self.sequence_number] = [packet, 0, 0]
+        self._transmit(self.sequence_number)
+        self.service()
+        return True
+    
+    def _transmit(self, seq_num):
+        """(Re)send an outstanding packet and restart its timer"""
+        entry = self._outstanding[seq_num]
+        packet = entry[0]
+        if entry[2]:
+            self.retransmissions += 1
+            self._log(f"Retransmitting packet {seq_num} (attempt {entry[2] + 1}/{self.retries})")
+        else:
+            self.packets_sent += 1
+        response = self._send_payload(packet)
+        if "+OK" not in response:
+            self._log(f"Failed to send packet {seq_num}")
+        entry[1] = time.monotonic()
+        entry[2] += 1
+    
+    def service(self):
+        """
+        Process received ACKs and retransmit packets whose timer expired
+        (windowed sender; call regularly from the main loop)
+        
+        Returns:
+            Number of packets still waiting for an acknowledgment
+        """
+        for source, data, _rssi, _snr in self._read_messages():
+            if source == self.destination:
+                self._handle_ack(data)
+        
+        now = time.monotonic()
+        for seq_num in list(self._outstanding):
+            entry = self._outstanding.get(seq_num)
+            if entry is None or now - entry[1] < self.timeout:
+                continue
+            if entry[2] >= self.retries:
+                del self._outstanding[seq_num]
+                self.packets_failed += 1
+                self._log(f"Giving up on packet {seq_num}")
+            else:
+                self._transmit(seq_num)
+        return len(self._outstanding)
+    
+    def _handle_ack(self, data):
+        """Release every outstanding packet covered by an ACK or SACK"""
+        packet = self._decode_packet(data)
+        if packet is None or packet[0] == "DATA":
+            return
+        if packet[0] == "SACK":
+            _, cumulative, bitmap = packet
+        else:
+            # Plain ACK: acknowledges exactly one packet
+            cumulative = None
+            acked = packet[1]
+        
+        for seq_num in list(self._outstanding):
+            if cumulative is None:
+                covered = seq_num == acked
+            else:
+                offset = seq_diff(seq_num, cumulative)
+                covered = offset <= 0 or (offset >= 2 and (bitmap >> (offset - 2)) & 1)
+            if covered:
+                del self._outstanding[seq_num]
+                self.packets_acked += 1
+    
+    def _accept_packet(self, data_part, rssi, snr):
+        """
+        Check a windowed data packet and record its sequence number
+        
+        Returns:
+            True if the packet was valid (new or duplicate, either way it gets ACKed)
+        """
+        packet = self._decode_packet(data_part)
+        if packet is None or packet[0] != "DATA":
+            return False
+        _, seq_num, data = packet
+        
+        if self._rx_base is None:
+            self._rx_sync(seq_num)
+        offset = seq_diff(seq_num, self._rx_base)
+        
+        if offset < -self.window_size:
+            # Far behind the window: the sender restarted
+            self._log(f"Sequence reset ({seq_num})")
+            self._rx_sync(seq_num)
+            offset = self.window_size - 1
+        elif offset < 0 or seq_num in self._rx_received:
+            self.duplicates += 1
+            self._log(f"Duplicate packet received (seq={seq_num})")
+            return True
+        
+        # The sender only moves past packets it gave up on: skip them
+        while offset >= self.window_size:
+            self._advance_rx_base()
+            offset -= 1
+        
+        self._rx_received.add(seq_num)
+        while self._rx_base in self._rx_received:
+            self._advance_rx_base()
+        
+        self.packets_received += 1
+        self._delivered.append((data, rssi, snr))
+        return True
+    
+    def _rx_sync(self, seq_num):
+        """
+        Start the receive window at the first packet seen
+        
+        Earlier packets of the same window may still be in flight, so the
+        window starts window_size - 1 below it; holes there that never fill
+        are not counted as lost.
+        """
+        self._rx_base = (seq_num - self.window_size + 1) % SEQ_MODULUS
+        self._rx_received = set()
+        self._rx_unknown = self.window_size - 1
+    
+    def _advance_rx_base(self):
+        """Move the receive window up by one sequence number"""
+        if self._rx_base in self._rx_received:
+            self._rx_received.remove(self._rx_base)
+        elif not self._rx_unknown:
+            self.packets_lost += 1
+        if self._rx_unknown:
+            self._rx_unknown -= 1
+        self._rx_base = (self._rx_base + 1) % SEQ_MODULUS
+    
+    def _send_sack(self):
+        """Send one cumulative + selective ACK covering the whole receive window"""
+        cumulative = (self._rx_base - 1) % SEQ_MODULUS
+        bitmap = 0
+        for seq_num in self._rx_received:
+            offset = seq_diff(seq_num, self._rx_base) - 1
+            if 0 <= offset < MAX_WINDOW:
+                bitmap |= 1 << offset
+        if self.binary:
+            ack_packet = self._encode_binary(cumulative, TYPE_SACK, struct.pack("<I", bitmap))
+        else:
+            ack_packet = f"SACK|{cumulative}|{bitmap:x}"
+        self._send_payload(ack_packet)
+        self._log(f"Sent SACK {cumulative}/{bitmap:x}")
+    
+    def _receive_windowed(self, timeout):
+        """Windowed receive: ACK every batch of packets with a single SACK"""
+        start_time = time.monotonic()
+        
+        while not self._delivered:
+            accepted = False
+            for source, data, rssi, snr in self._read_messages():
+                if source == self.destination and self._accept_packet(data, rssi, snr):
+                    accepted = True
+            if accepted:
+                self._send_sack()
+            if self._delivered or time.monotonic() - start_time >= timeout:
+                break
+            time.sleep(0.01)
+        
+        if self._delivered:
+            data, self.last_rssi, self.last_snr = self._delivered.pop(0)
+            return data
+        return None
+    
+    def link_stats(self):
+        """Summary of the ARQ counters"""
+        return (f"sent {self.packets_sent}, retransmitted {self.retransmissions}, "
+                f"acked {self.packets_acked}, failed {self.packets_failed}, "
+                f"in flight {len(self._outstanding)}, received {self.packets_received}, "
+                f"duplicates {self.duplicates}, lost {self.packets_lost}, "
+                f"malformed {self._parser.malformed}")
@@ -17,6 +17,21 @@ from adafruit_display_text import label
 import terminalio
 import supervisor
 
+# Import BME680Forced class
+try:
+    from bme680_forced import BME680Forced
+    print("BME680Forced imported")
+except ImportError:
+    print("BME680Forced import failed, copy Software/bme680_forced.py to the device")
+
+# Import MPU6050Burst class
+try:
+    from mpu6050_burst import MPU6050Burst, I2C_FAST_FREQUENCY
+    print("MPU6050Burst imported")
+except ImportError:
+    print("MPU6050Burst import failed, copy Software/mpu6050_burst.py to the device")
+    I2C_FAST_FREQUENCY = 100000
+
 # Configuration constants
 LORA_ADDRESS = 1           # Address of this device
 LORA_DESTINATION = 2       # Address of Teensy 4.1
@@ -24,9 +39,10 @@ LORA_NETWORK_ID = 18       # Network ID (must be same for both devices)
 LORA_BAND = 915000000      # Frequency in Hz (915MHz for US)
 LORA_PARAMETERS = "9,7,1,12"  # SF=9, BW=125kHz, CR=4/5, Preamble=12
 TRANSMISSION_INTERVAL = 10  # Send data every 10 seconds
+BME680_GAS_HEATER = True    # Set False in flight to skip the slow gas measurement
 
-# Initialize I2C bus
-i2c = busio.I2C(board.SCL, board.SDA)
+# Initialize I2C bus (400 kHz fast mode; drop frequency= for the 100 kHz default)
+i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FAST_FREQUENCY)
 
 # Initialize UART for LoRa radio
 uart = busio.UART(board.TX2, board.RX2, baudrate=115200)
@@ -41,17 +57,23 @@ photodiode = analogio.AnalogIn(board.A0)  # Adjust pin as needed
 try:
     bme680 = adafruit_bme680.Adafruit_BME680_I2C(i2c)
     bme680.sea_level_pressure = 1013.25  # Set to your local pressure for altitude calculation
+    # Non-blocking forced-mode reads, one conversion serves every field
+    bme_reader = BME680Forced(bme680, gas_heater=BME680_GAS_HEATER)
     print("BME680 initialized")
 except Exception as e:
     print(f"BME680 initialization failed: {e}")
     bme680 = None
+    bme_reader = None
 
 try:
     mpu = adafruit_mpu6050.MPU6050(i2c)
+    # Accel, temperature and gyro in a single 14-byte transaction
+    imu = MPU6050Burst(mpu)
     print("MPU6050 initialized")
 except Exception as e:
     print(f"MPU6050 initialization failed: {e}")
     mpu = None
+    imu = None
 
 try:
     gps = adafruit_gps.GPS_GtopI2C(i2c)
@@ -110,23 +132,26 @@ def init_lora():
 def read_sensors():
     data = {}
     
-    # Read BME680 data
-    if bme680:
+    # Read BME680 data (latest finished conversion)
+    if bme_reader:
         try:
-            data["temperature"] = bme680.temperature
-            data["humidity"] = bme680.relative_humidity
-            data["pressure"] = bme680.pressure
-            data["gas"] = bme680.gas
-            data["altitude"] = bme680.altitude
+            bme_reader.update()
+            if bme_reader.timestamp is not None:
+                data["temperature"] = bme_reader.temperature
+                data["humidity"] = bme_reader.relative_humidity
+                data["pressure"] = bme_reader.pressure
+                if bme_reader.gas is not None:
+                    data["gas"] = bme_reader.gas
+                data["altitude"] = bme_reader.altitude
         except Exception as e:
             print(f"Error reading BME680: {e}")
     
     # Read MPU6050 data
-    if mpu:
+    if imu:
         try:
-            data["acceleration"] = mpu.acceleration
-            data["gyro"] = mpu.gyro
-            data["temperature_mpu"] = mpu.temperature
+            data["acceleration"] = imu.read()
+            data["gyro"] = imu.gyro
+            data["temperature_mpu"] = imu.temperature
         except Exception as e:
             print(f"Error reading MPU6050: {e}")
     
@@ -19,6 +19,13 @@ try:
     print("LoRaProtocol imported")
 except ImportError:
     print("LoRaProtocol import failed, copy lora_protocol.py to the device")
+
+# Import the incremental GPS reader
+try:
+    from gps_reader import GPSReader
+    print("GPSReader imported")
+except ImportError:
+    print("GPSReader import failed, copy Software/gps_reader.py to the device")
     
 # Configuration constants
 LORA_ADDRESS = 2           # Address of this device
@@ -26,7 +33,11 @@ LORA_SOURCE = 1            # Address of Teensy 4.0
 LORA_NETWORK_ID = 18       # Network ID (must be same for both devices)
 LORA_BAND = 915000000      # Frequency in Hz (915MHz for US)
 LORA_PARAMETERS = "9,7,1,12"  # SF=9, BW=125kHz, CR=4/5, Preamble=12
+LORA_WINDOW_SIZE = 8          # Must match the sender (1 = stop-and-wait)
+LORA_BINARY = True            # Compact COBS + CRC-16 packets (must match the sender)
 DATA_CHECK_INTERVAL = 0.5     # Check for new data every 1 second
+GPS_RATE_HZ = 5               # GGA + RMC at 5 Hz fits in 9600 baud
+GPS_MAX_FIX_AGE = 2.0         # Seconds before a fix is reported as missing
 
 # Initialize I2C bus
 i2c = busio.I2C(board.SCL, board.SDA)
@@ -35,7 +46,8 @@ i2c = busio.I2C(board.SCL, board.SDA)
 uart_lora = busio.UART(board.TX2, board.RX2, baudrate=115200)
 
 # Initialize UART for GPS (TX/RX GPS)
-uart_gps = busio.UART(board.TX1, board.RX1, baudrate=9600)
+# (buffer holds >1 s of sentences while receive_packet blocks)
+uart_gps = busio.UART(board.TX1, board.RX1, baudrate=9600, receiver_buffer_size=1024)
 
 # Initialize sensors
 try:
@@ -48,14 +60,14 @@ except Exception as e:
 
 try:
     gps = adafruit_gps.GPS(uart_gps, debug=False)
-    # Turn on the basic GGA and RMC info
-    gps.send_command(b'PMTK314,0,1,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0')
-    # Set update rate to once a second (1Hz)
-    gps.send_command(b'PMTK220,1000')
+    # Only GGA and RMC, parsed incrementally from whatever has arrived
+    gps_reader = GPSReader(gps)
+    gps_reader.configure(GPS_RATE_HZ, ("GGA", "RMC"))
     print("GPS initialized")
 except Exception as e:
     print(f"GPS initialization failed: {e}")
     gps = None
+    gps_reader = None
 
 
 # Function to initialize LoRa module
@@ -65,7 +77,8 @@ def init_lora():
     try:
         # Create LoRaProtocol instance
         global lora_protocol
-        lora_protocol = LoRaProtocol(uart_lora, LORA_ADDRESS, LORA_SOURCE, debug=True)
+        lora_protocol = LoRaProtocol(uart_lora, LORA_ADDRESS, LORA_SOURCE, debug=True,
+                                     window_size=LORA_WINDOW_SIZE, binary=LORA_BINARY)
         
         # Initialize the module
         success = lora_protocol.initialize(LORA_NETWORK_ID, LORA_BAND, LORA_PARAMETERS)
@@ -94,16 +107,19 @@ def read_local_sensors():
             print(f"Error reading BME680: {e}")
     
     # Read GPS data
-    if gps:
+    if gps_reader:
         try:
-            gps.update()
-            data["t41_gps_fix"] = gps.has_fix
-            if gps.has_fix:
-                data["t41_latitude"] = gps.latitude
-                data["t41_longitude"] = gps.longitude
-                data["t41_altitude_gps"] = gps.altitude_m
-                data["t41_speed"] = gps.speed_knots
-                data["t41_satellites"] = gps.satellites
+            gps_reader.update()
+            age = gps_reader.fix_age()
+            has_fix = age is not None and age <= GPS_MAX_FIX_AGE
+            data["t41_gps_fix"] = has_fix
+            if has_fix:
+                data["t41_latitude"] = gps_reader.latitude
+                data["t41_longitude"] = gps_reader.longitude
+                data["t41_altitude_gps"] = gps_reader.altitude_m
+                data["t41_speed"] = gps_reader.speed_knots
+                data["t41_satellites"] = gps_reader.satellites
+                data["t41_gps_fix_age"] = age
             else:
                 data["t41_gps_status"] = "No fix"
         except Exception as e:
@@ -122,6 +138,8 @@ def check_lora_data():
         data_str = lora_protocol.receive_packet(timeout=1)
         if not data_str:
             return None
+        if LORA_BINARY:
+            data_str = data_str.decode('utf-8')
         
         print(f"Received data: {data_str}")
         
@@ -145,7 +163,9 @@ def check_lora_data():
                 "t40_latitude": float(values[11]),
                 "t40_longitude": float(values[12]),
                 "t40_light": float(values[13]),
-                # RSSI and SNR are handled internally by the protocol
+                # Link quality of the packet this reading arrived in
+                "t40_rssi": lora_protocol.last_rssi,
+                "t40_snr": lora_protocol.last_snr,
             }
             return data
         else:
@@ -183,6 +203,10 @@ def main():
     # Main loop
     while True:
         try:
+            # Drain the GPS before and after the blocking LoRa receive
+            if gps_reader:
+                gps_reader.update()
+
             # Check for data from Teensy 4.0
             received_data = check_lora_data()
             
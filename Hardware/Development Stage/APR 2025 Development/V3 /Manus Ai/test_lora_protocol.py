@@ -0,0 +1,120 @@
+"""
+Round-trip tests for the LoRa protocol framing (lora_protocol.py)
+
+Run with: python -m pytest
+"""
+import pytest
+
+from lora_protocol import TYPE_ACK, LoRaProtocol, RcvParser, cobs_decode, cobs_encode
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x00",
+    b"\x00\x00\x00",
+    b"hello",
+    b"\x11\x00\x22\x00",
+    bytes(range(256)),
+    bytes(range(1, 255)),        # exactly one full 254 byte block
+    bytes(range(1, 256)) * 2,    # runs longer than 254 non-zero bytes
+])
+def test_cobs_round_trip(data):
+    encoded = cobs_encode(data)
+    assert 0 not in encoded
+    assert cobs_decode(encoded) == data
+
+
+@pytest.mark.parametrize("data", [b"\x00\x01", b"\x05ab", b"\x02a\x00"])
+def test_cobs_rejects_invalid_data(data):
+    with pytest.raises(ValueError):
+        cobs_decode(data)
+
+
+def make_protocol(binary, window_size=8):
+    # The UART is never touched: tests call the packet helpers directly
+    return LoRaProtocol(None, 1, 2, window_size=window_size, binary=binary)
+
+
+def test_binary_data_packet_round_trip():
+    protocol = make_protocol(binary=True)
+    data = b"\x00telemetry,|\x00" + bytes(range(40))
+    packet = protocol._make_packet(513, data)
+    assert 0 not in packet
+    assert protocol._decode_packet(packet) == ("DATA", 513, data)
+
+
+def test_binary_packet_with_bad_crc_is_rejected():
+    protocol = make_protocol(binary=True)
+    frame = bytearray(cobs_decode(protocol._make_packet(7, b"abc")))
+    frame[3] ^= 0x01
+    assert protocol._decode_packet(cobs_encode(frame)) is None
+
+
+def test_text_data_packet_round_trip():
+    protocol = make_protocol(binary=False)
+    packet = protocol._make_packet(42, "1.0,2|3")
+    assert protocol._decode_packet(packet) == ("DATA", 42, "1.0,2|3")
+    assert protocol._decode_packet(packet.replace("1.0", "1.1")) is None
+
+
+def test_binary_packet_survives_rcv_parser():
+    protocol = make_protocol(binary=True)
+    packet = protocol._make_packet(3, b",\n,\r")
+    line = b"+RCV=2," + str(len(packet)).encode() + b"," + packet + b",-40,11\r\n"
+    parser = RcvParser()
+    frames = []
+    for i in range(0, len(line), 5):
+        frames += parser.feed(line[i:i + 5])[0]
+    assert frames == [(2, packet, -40, 11)]
+    assert protocol._decode_packet(frames[0][1]) == ("DATA", 3, b",\n,\r")
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_sack_releases_only_received_packets(binary):
+    sender = make_protocol(binary)
+    receiver = make_protocol(binary)
+    payload = b"x" if binary else "x"
+
+    # Sender has 1..6 in flight; 3 and 6 are lost on the way
+    for seq_num in range(1, 7):
+        sender._outstanding[seq_num] = [sender._make_packet(seq_num, payload), 0, 1]
+    receiver._rx_base = 1
+    for seq_num in (1, 2, 4, 5):
+        assert receiver._accept_packet(sender._outstanding[seq_num][0], -50, 8)
+
+    sent = []
+    receiver._send_payload = sent.append
+    receiver._send_sack()
+    assert receiver._decode_packet(sent[0]) == ("SACK", 2, 0b11)
+
+    sender._handle_ack(sent[0])
+    assert sorted(sender._outstanding) == [3, 6]
+    assert sender.packets_acked == 4
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_sack_across_sequence_wrap(binary):
+    sender = make_protocol(binary)
+    receiver = make_protocol(binary)
+    payload = b"x" if binary else "x"
+    sequence = [65534, 65535, 0, 1]
+
+    for seq_num in sequence:
+        sender._outstanding[seq_num] = [sender._make_packet(seq_num, payload), 0, 1]
+    receiver._rx_base = 65534
+    for seq_num in (65534, 0, 1):
+        assert receiver._accept_packet(sender._outstanding[seq_num][0], -50, 8)
+
+    sent = []
+    receiver._send_payload = sent.append
+    receiver._send_sack()
+    sender._handle_ack(sent[0])
+    assert list(sender._outstanding) == [65535]
+
+
+def test_plain_ack_releases_one_packet():
+    sender = make_protocol(binary=True)
+    for seq_num in (1, 2):
+        sender._outstanding[seq_num] = [sender._make_packet(seq_num, b"x"), 0, 1]
+    sender._handle_ack(sender._encode_binary(2, TYPE_ACK, b""))
+    assert list(sender._outstanding) == [1]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Buffered Log Writer
+
+Long-lived append-only writer used by the Teensy data loggers for their CSV
+and JSON files. The file stays open for the whole session and records are
+collected in a userspace buffer, which is flushed to the OS as a group every
+N records or every T milliseconds (whichever comes first), on close, and when
+the logger shuts down on a signal.
+
+Durability is a knob: by default a flush hands the data to the OS, which
+survives the logger crashing. With fsync enabled every flush also waits for
+the data to reach the disk, which survives a power loss as well.
+
+flush() may be called from another thread (e.g. before a background report
+re-reads the file).
+"""
+
+import csv
+import io
+import os
+import threading
+import time
+
+DEFAULT_FLUSH_RECORDS = 50
+DEFAULT_FLUSH_INTERVAL_MS = 1000
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Column order of the CSV log shared by both Teensy data loggers
+CSV_HEADER = [
+    'Timestamp', 'Local Time', 'Device Time (ms)', 'Sender Address',
+    'RSSI', 'SNR', 'Temperature (°C)', 'Pressure (hPa)', 'Humidity (%)',
+    'Gas Resistance (kOhms)', 'AccelX (g)', 'AccelY (g)', 'AccelZ (g)',
+    'GyroX (°/s)', 'GyroY (°/s)', 'GyroZ (°/s)', 'Light Level'
+]
+
+
+class BufferedLogWriter:
+    """Append-only file writer with group commit and write/flush counters."""
+
+    def __init__(self, path, header=None, flush_records=DEFAULT_FLUSH_RECORDS,
+                 flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS, fsync=False,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Open (or create) the log file.
+
+        Args:
+            path: File to append to
+            header: CSV header row, written only when the file is new
+            flush_records: Flush once this many records are pending (0 = no limit)
+            flush_interval_ms: Longest time a record stays pending, in milliseconds
+            fsync: Also fsync on every flush (power-loss safe, slower)
+            buffer_size: Size of the userspace write buffer in bytes
+        """
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fsync = fsync
+        self.file = open(path, 'ab', buffering=buffer_size)
+        self._lock = threading.RLock()
+
+        # Rows are formatted into a scratch buffer so every byte written is counted
+        self._scratch = io.StringIO()
+        self._csv = csv.writer(self._scratch)
+
+        # Counters
+        self.records = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.pending = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self.last_flush = time.monotonic()
+
+        if header is not None and self.file.tell() == 0:
+            self._write(self._format_row(header))
+            self.flush()
+
+    def _format_row(self, row):
+        self._csv.writerow(row)
+        text = self._scratch.getvalue()
+        self._scratch.seek(0)
+        self._scratch.truncate()
+        return text
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self.file.write(data)
+        self.bytes_written += len(data)
+
+    def _record_written(self):
+        self.records += 1
+        self.pending += 1
+        if self.flush_records and self.pending >= self.flush_records:
+            self.flush()
+        else:
+            self.poll()
+
+    def write_row(self, row):
+        """Append one CSV row."""
+        with self._lock:
+            self._write(self._format_row(row))
+            self._record_written()
+
+    def write_line(self, line):
+        """Append one line of text (a newline is added)."""
+        with self._lock:
+            self._write(line + '\n')
+            self._record_written()
+
+    def poll(self):
+        """Flush pending records if the flush interval has passed."""
+        if self.pending and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Hand everything written so far to the OS (and the disk if fsync is on)."""
+        with self._lock:
+            if self.file.closed:
+                return
+            start = time.perf_counter()
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            elapsed = time.perf_counter() - start
+            self.flush_time_total += elapsed
+            self.flush_time_max = max(self.flush_time_max, elapsed)
+            self.flushes += 1
+            self.pending = 0
+            self.last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and close the file; safe to call more than once."""
+        with self._lock:
+            if self.file.closed:
+                return
+            self.flush()
+            self.file.close()
+
+    def stats(self):
+        """Summary of the write and flush counters."""
+        mean_ms = 1000.0 * self.flush_time_total / self.flushes if self.flushes else 0.0
+        return (f"{os.path.basename(self.path)}: {self.records} records, {self.bytes_written} bytes, "
+                f"{self.flushes} flushes (mean {mean_ms:.2f} ms, max {1000.0 * self.flush_time_max:.2f} ms)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Coalescing Report Worker
+
+Runs a slow job (rebuilding the Excel workbook and rendering the graphs) on a
+background thread so the serial read loop never waits for it. Requests are
+coalesced: while a run is pending or in progress, new requests are merged
+into the single next run, so at most one run is ever queued and it always
+works on the latest data.
+"""
+
+import atexit
+import threading
+import time
+
+
+class CoalescingWorker:
+    """Background thread that runs job() once per batch of requests."""
+
+    def __init__(self, job, name="report-worker"):
+        """
+        Start the worker thread.
+
+        Args:
+            job: Callable with no arguments, run on the worker thread
+            name: Thread name
+        """
+        self.job = job
+        self._condition = threading.Condition()
+        self._pending = False
+        self._stopping = False
+
+        # Counters
+        self.requests = 0
+        self.merged = 0
+        self.runs = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # A daemon thread would otherwise be killed in the middle of a run at exit
+        atexit.register(self.close)
+
+    def request(self):
+        """Ask for a run; returns immediately."""
+        with self._condition:
+            self.requests += 1
+            if self._pending:
+                self.merged += 1
+            else:
+                self._pending = True
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                self._pending = False
+
+            start = time.perf_counter()
+            try:
+                self.job()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in background report: {e}")
+            elapsed = time.perf_counter() - start
+
+            self.runs += 1
+            self.last_latency = elapsed
+            self.total_latency += elapsed
+            self.max_latency = max(self.max_latency, elapsed)
+
+    def close(self, timeout=None):
+        """Finish any pending run, then stop the thread; safe to call more than once."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Summary of the request and latency counters."""
+        mean = self.total_latency / self.runs if self.runs else 0.0
+        return (f"Reports: {self.requests} requests, {self.runs} runs, {self.merged} merged, "
+                f"{self.errors} errors, render {self.last_latency:.2f} s last / "
+                f"{mean:.2f} s mean / {self.max_latency:.2f} s max")
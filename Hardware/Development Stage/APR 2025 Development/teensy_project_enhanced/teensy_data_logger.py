@@ -15,14 +15,15 @@ import serial
 import serial.tools.list_ports
 import time
 import datetime
-import csv
 import os
 import argparse
 import platform
 import json
 import threading
+import signal
 import sys
 from pathlib import Path
+from log_writer import BufferedLogWriter, CSV_HEADER, DEFAULT_FLUSH_RECORDS, DEFAULT_FLUSH_INTERVAL_MS
 
 # Default settings
 DEFAULT_BAUD_RATE = 115200
@@ -31,7 +32,8 @@ DEFAULT_CSV_FILENAME = "sensor_data.csv"
 DEFAULT_JSON_FILENAME = "sensor_data.json"
 
 class TeensyDataLogger:
-    def __init__(self, port=None, baud_rate=DEFAULT_BAUD_RATE, log_dir=DEFAULT_LOG_DIR):
+    def __init__(self, port=None, baud_rate=DEFAULT_BAUD_RATE, log_dir=DEFAULT_LOG_DIR,
+                 flush_records=DEFAULT_FLUSH_RECORDS, flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS, fsync=False):
         """Initialize the Teensy Data Logger."""
         self.port = port
         self.baud_rate = baud_rate
@@ -47,17 +49,12 @@ class TeensyDataLogger:
         self.csv_path = os.path.join(log_dir, DEFAULT_CSV_FILENAME)
         self.json_path = os.path.join(log_dir, DEFAULT_JSON_FILENAME)
         
-        # Check if CSV file exists, if not create it with headers
-        csv_exists = os.path.isfile(self.csv_path)
-        with open(self.csv_path, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            if not csv_exists:
-                writer.writerow([
-                    'Timestamp', 'Local Time', 'Device Time (ms)', 'Sender Address', 
-                    'RSSI', 'SNR', 'Temperature (°C)', 'Pressure (hPa)', 'Humidity (%)', 
-                    'Gas Resistance (kOhms)', 'AccelX (g)', 'AccelY (g)', 'AccelZ (g)', 
-                    'GyroX (°/s)', 'GyroY (°/s)', 'GyroZ (°/s)', 'Light Level'
-                ])
+        # Both files stay open for the session and are flushed in groups
+        # (the CSV header is written only if the file is new)
+        self.csv_log = BufferedLogWriter(self.csv_path, header=CSV_HEADER, flush_records=flush_records,
+                                         flush_interval_ms=flush_interval_ms, fsync=fsync)
+        self.json_log = BufferedLogWriter(self.json_path, flush_records=flush_records,
+                                          flush_interval_ms=flush_interval_ms, fsync=fsync)
     
     def find_teensy_port(self):
         """Automatically find the Teensy serial port."""
@@ -89,7 +86,8 @@ class TeensyDataLogger:
                 raise Exception("Teensy device not found. Please specify port manually.")
         
         try:
-            self.serial_connection = serial.Serial(self.port, self.baud_rate, timeout=1)
+            # serial_for_url also accepts socket://localhost:PORT from telemetry_hub.py
+            self.serial_connection = serial.serial_for_url(self.port, self.baud_rate, timeout=1)
             print(f"Connected to Teensy on {self.port} at {self.baud_rate} baud")
             return True
         except serial.SerialException as e:
@@ -97,10 +95,20 @@ class TeensyDataLogger:
             return False
     
     def disconnect(self):
-        """Disconnect from the Teensy device."""
+        """Disconnect from the Teensy device and flush the log files."""
         if self.serial_connection and self.serial_connection.is_open:
             self.serial_connection.close()
             print("Disconnected from Teensy")
+        self.close_logs()
+    
+    def close_logs(self):
+        """Flush and close the CSV and JSON files."""
+        if self.csv_log.file.closed:
+            return
+        self.csv_log.close()
+        self.json_log.close()
+        print(self.csv_log.stats())
+        print(self.json_log.stats())
     
     def parse_data(self, data_string):
         """Parse the data string received from Teensy."""
@@ -126,27 +134,25 @@ class TeensyDataLogger:
         local_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Log to CSV
-        with open(self.csv_path, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow([
-                timestamp,
-                local_time,
-                data_dict.get('TIME', ''),
-                data_dict.get('ADDR', ''),
-                data_dict.get('RSSI', ''),
-                data_dict.get('SNR', ''),
-                data_dict.get('T', ''),
-                data_dict.get('P', ''),
-                data_dict.get('H', ''),
-                data_dict.get('G', ''),
-                data_dict.get('AX', ''),
-                data_dict.get('AY', ''),
-                data_dict.get('AZ', ''),
-                data_dict.get('GX', ''),
-                data_dict.get('GY', ''),
-                data_dict.get('GZ', ''),
-                data_dict.get('L', '')
-            ])
+        self.csv_log.write_row([
+            timestamp,
+            local_time,
+            data_dict.get('TIME', ''),
+            data_dict.get('ADDR', ''),
+            data_dict.get('RSSI', ''),
+            data_dict.get('SNR', ''),
+            data_dict.get('T', ''),
+            data_dict.get('P', ''),
+            data_dict.get('H', ''),
+            data_dict.get('G', ''),
+            data_dict.get('AX', ''),
+            data_dict.get('AY', ''),
+            data_dict.get('AZ', ''),
+            data_dict.get('GX', ''),
+            data_dict.get('GY', ''),
+            data_dict.get('GZ', ''),
+            data_dict.get('L', '')
+        ])
         
         # Log to JSON (append to JSON array)
         json_entry = {
@@ -156,8 +162,7 @@ class TeensyDataLogger:
         }
         
         # Append to JSON file
-        with open(self.json_path, 'a') as jsonfile:
-            jsonfile.write(json.dumps(json_entry) + '\n')
+        self.json_log.write_line(json.dumps(json_entry))
         
         self.data_count += 1
         return True
@@ -204,6 +209,10 @@ class TeensyDataLogger:
                         except Exception as e:
                             print(f"Error processing data: {e}")
                             print(f"Raw data: {line}")
+                else:
+                    # Quiet link: still flush records older than the flush interval
+                    self.csv_log.poll()
+                    self.json_log.poll()
                 time.sleep(0.01)  # Small delay to prevent CPU hogging
         except KeyboardInterrupt:
             print("\nLogging stopped by user")
@@ -233,6 +242,12 @@ def main():
     parser.add_argument('-b', '--baud', type=int, default=DEFAULT_BAUD_RATE, help='Baud rate')
     parser.add_argument('-d', '--directory', default=DEFAULT_LOG_DIR, help='Log directory')
     parser.add_argument('-l', '--list', action='store_true', help='List available serial ports')
+    parser.add_argument('--flush-records', type=int, default=DEFAULT_FLUSH_RECORDS,
+                        help='Flush the log files every N records')
+    parser.add_argument('--flush-ms', type=int, default=DEFAULT_FLUSH_INTERVAL_MS,
+                        help='Flush the log files at least every T milliseconds')
+    parser.add_argument('--fsync', action='store_true',
+                        help='fsync on every flush (survives power loss, slower)')
     
     args = parser.parse_args()
     
@@ -240,7 +255,11 @@ def main():
         list_serial_ports()
         return
     
-    logger = TeensyDataLogger(port=args.port, baud_rate=args.baud, log_dir=args.directory)
+    logger = TeensyDataLogger(port=args.port, baud_rate=args.baud, log_dir=args.directory,
+                              flush_records=args.flush_records, flush_interval_ms=args.flush_ms,
+                              fsync=args.fsync)
+    # Turn SIGTERM into a normal exit so pending records are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     try:
         logger.start_logging()
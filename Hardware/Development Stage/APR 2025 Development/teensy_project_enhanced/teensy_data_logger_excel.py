@@ -16,15 +16,17 @@ import serial
 import serial.tools.list_ports
 import time
 import datetime
-import csv
 import os
 import argparse
 import platform
 import json
 import threading
+import signal
 import sys
 from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # graphs are rendered to PNG files on a background thread
 import matplotlib.pyplot as plt
 from openpyxl import Workbook
 from openpyxl.chart import (
@@ -36,6 +38,8 @@ from openpyxl.chart.axis import DateAxis
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.drawing.image import Image
+from log_writer import BufferedLogWriter, CSV_HEADER, DEFAULT_FLUSH_RECORDS, DEFAULT_FLUSH_INTERVAL_MS
+from report_worker import CoalescingWorker
 
 # Default settings
 DEFAULT_BAUD_RATE = 115200
@@ -46,7 +50,8 @@ DEFAULT_EXCEL_FILENAME = "sensor_data.xlsx"
 DEFAULT_GRAPH_DIR = "graphs"
 
 class TeensyDataLogger:
-    def __init__(self, port=None, baud_rate=DEFAULT_BAUD_RATE, log_dir=DEFAULT_LOG_DIR):
+    def __init__(self, port=None, baud_rate=DEFAULT_BAUD_RATE, log_dir=DEFAULT_LOG_DIR,
+                 flush_records=DEFAULT_FLUSH_RECORDS, flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS, fsync=False):
         """Initialize the Teensy Data Logger."""
         self.port = port
         self.baud_rate = baud_rate
@@ -67,21 +72,21 @@ class TeensyDataLogger:
         self.json_path = os.path.join(log_dir, DEFAULT_JSON_FILENAME)
         self.excel_path = os.path.join(log_dir, DEFAULT_EXCEL_FILENAME)
         
-        # Check if CSV file exists, if not create it with headers
-        csv_exists = os.path.isfile(self.csv_path)
-        with open(self.csv_path, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            if not csv_exists:
-                writer.writerow([
-                    'Timestamp', 'Local Time', 'Device Time (ms)', 'Sender Address', 
-                    'RSSI', 'SNR', 'Temperature (°C)', 'Pressure (hPa)', 'Humidity (%)', 
-                    'Gas Resistance (kOhms)', 'AccelX (g)', 'AccelY (g)', 'AccelZ (g)', 
-                    'GyroX (°/s)', 'GyroY (°/s)', 'GyroZ (°/s)', 'Light Level'
-                ])
+        # Both files stay open for the session and are flushed in groups
+        # (the CSV header is written only if the file is new)
+        self.csv_log = BufferedLogWriter(self.csv_path, header=CSV_HEADER, flush_records=flush_records,
+                                         flush_interval_ms=flush_interval_ms, fsync=fsync)
+        self.json_log = BufferedLogWriter(self.json_path, flush_records=flush_records,
+                                          flush_interval_ms=flush_interval_ms, fsync=fsync)
         
         # Initialize Excel file if it doesn't exist
         if not os.path.isfile(self.excel_path):
             self.create_excel_file()
+        
+        # Excel and graph regeneration run off the serial read loop; requests
+        # made while one is pending are merged into it
+        self.report_lock = threading.RLock()
+        self.report_worker = CoalescingWorker(self.update_reports)
     
     def find_teensy_port(self):
         """Automatically find the Teensy serial port."""
@@ -113,7 +118,8 @@ class TeensyDataLogger:
                 raise Exception("Teensy device not found. Please specify port manually.")
         
         try:
-            self.serial_connection = serial.Serial(self.port, self.baud_rate, timeout=1)
+            # serial_for_url also accepts socket://localhost:PORT from telemetry_hub.py
+            self.serial_connection = serial.serial_for_url(self.port, self.baud_rate, timeout=1)
             print(f"Connected to Teensy on {self.port} at {self.baud_rate} baud")
             return True
         except serial.SerialException as e:
@@ -121,10 +127,24 @@ class TeensyDataLogger:
             return False
     
     def disconnect(self):
-        """Disconnect from the Teensy device."""
+        """Disconnect from the Teensy device and flush the log files."""
         if self.serial_connection and self.serial_connection.is_open:
             self.serial_connection.close()
             print("Disconnected from Teensy")
+        # Let the last requested report finish before the CSV is closed
+        self.report_worker.close()
+        if self.report_worker.requests:
+            print(self.report_worker.stats())
+        self.close_logs()
+    
+    def close_logs(self):
+        """Flush and close the CSV and JSON files."""
+        if self.csv_log.file.closed:
+            return
+        self.csv_log.close()
+        self.json_log.close()
+        print(self.csv_log.stats())
+        print(self.json_log.stats())
     
     def parse_data(self, data_string):
         """Parse the data string received from Teensy."""
@@ -171,9 +191,7 @@ class TeensyDataLogger:
         ]
         
         # Log to CSV
-        with open(self.csv_path, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(csv_row)
+        self.csv_log.write_row(csv_row)
         
         # Log to JSON (append to JSON array)
         json_entry = {
@@ -183,8 +201,7 @@ class TeensyDataLogger:
         }
         
         # Append to JSON file
-        with open(self.json_path, 'a') as jsonfile:
-            jsonfile.write(json.dumps(json_entry) + '\n')
+        self.json_log.write_line(json.dumps(json_entry))
         
         # Add to data buffer for Excel
         self.data_buffer.append({
@@ -209,10 +226,9 @@ class TeensyDataLogger:
         
         self.data_count += 1
         
-        # Update Excel file periodically
+        # Update Excel file periodically (in the background)
         if self.data_count % self.excel_update_interval == 0:
-            self.update_excel_file()
-            self.generate_graphs()
+            self.report_worker.request()
         
         return True
     
@@ -280,10 +296,21 @@ class TeensyDataLogger:
         wb.save(self.excel_path)
         print(f"Created Excel file: {self.excel_path}")
     
+    def update_reports(self):
+        """Rebuild the Excel file and the graphs from the CSV (report worker job)."""
+        with self.report_lock:
+            self.update_excel_file()
+            self.generate_graphs()
+    
     def update_excel_file(self):
         """Update the Excel file with new data."""
+        with self.report_lock:
+            self._update_excel_file()
+    
+    def _update_excel_file(self):
         try:
             # Load existing data from CSV to ensure we have everything
+            self.csv_log.flush()
             df = pd.read_csv(self.csv_path)
             
             # Create a new workbook
@@ -374,8 +401,13 @@ class TeensyDataLogger:
     
     def generate_graphs(self):
         """Generate graphs from the collected data."""
+        with self.report_lock:
+            self._generate_graphs()
+    
+    def _generate_graphs(self):
         try:
             # Load data from CSV
+            self.csv_log.flush()
             df = pd.read_csv(self.csv_path)
             
             if len(df) < 2:
@@ -683,6 +715,10 @@ class TeensyDataLogger:
                         except Exception as e:
                             print(f"Error processing data: {e}")
                             print(f"Raw data: {line}")
+                else:
+                    # Quiet link: still flush records older than the flush interval
+                    self.csv_log.poll()
+                    self.json_log.poll()
                 time.sleep(0.01)  # Small delay to prevent CPU hogging
         except KeyboardInterrupt:
             print("\nLogging stopped by user")
@@ -692,8 +728,7 @@ class TeensyDataLogger:
             self.running = False
             # Make sure to update Excel with any remaining data
             if self.data_buffer:
-                self.update_excel_file()
-                self.generate_graphs()
+                self.report_worker.request()
             self.disconnect()
         
         return True
@@ -716,6 +751,12 @@ def main():
     parser.add_argument('-b', '--baud', type=int, default=DEFAULT_BAUD_RATE, help='Baud rate')
     parser.add_argument('-d', '--directory', default=DEFAULT_LOG_DIR, help='Log directory')
     parser.add_argument('-l', '--list', action='store_true', help='List available serial ports')
+    parser.add_argument('--flush-records', type=int, default=DEFAULT_FLUSH_RECORDS,
+                        help='Flush the log files every N records')
+    parser.add_argument('--flush-ms', type=int, default=DEFAULT_FLUSH_INTERVAL_MS,
+                        help='Flush the log files at least every T milliseconds')
+    parser.add_argument('--fsync', action='store_true',
+                        help='fsync on every flush (survives power loss, slower)')
     
     args = parser.parse_args()
     
@@ -723,7 +764,11 @@ def main():
         list_serial_ports()
         return
     
-    logger = TeensyDataLogger(port=args.port, baud_rate=args.baud, log_dir=args.directory)
+    logger = TeensyDataLogger(port=args.port, baud_rate=args.baud, log_dir=args.directory,
+                              flush_records=args.flush_records, flush_interval_ms=args.flush_ms,
+                              fsync=args.fsync)
+    # Turn SIGTERM into a normal exit so pending records are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     try:
         logger.start_logging()
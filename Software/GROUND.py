@@ -4,6 +4,8 @@ import time
 import json
 import adafruit_ssd1306
 import random
+import telemetry_frame
+import telemetry_fec
 
 def scan_i2c(i2c):
     try:
@@ -91,43 +93,53 @@ def configure_lora():
     display_message(display, "LoRa OK")
     return True
 
-def process_data(raw):
-    try:
-        data = json.loads(raw)
-
-        if isinstance(data[0], list):  # It's a list of lists
-            datasets = data
-        else:  # It's a single dataset
-            datasets = [data]
+def fmt(value, spec):
+    """Format a decoded field, or "--" when the frame marks it missing"""
+    return "--" if value is None else format(value, spec)
 
-        for dataset in datasets:
+def process_data(frames):
+    global last_display_update
+    for frame in frames:
+        try:
+            # Forward first, so a frame the display code chokes on still reaches the PC
             if pc_uart:
-                pc_uart.write((json.dumps(dataset) + "\n").encode("utf-8"))
-                print("sent through uart to computer")
+                pc_uart.write(frame)
+
+            # Launch capture chunks are only reassembled on the PC
+            if telemetry_frame.frame_type(frame) == telemetry_frame.FRAME_EVENT:
+                continue
+            dataset = telemetry_frame.decode(frame)
+
+            if telemetry_frame.frame_type(frame) == telemetry_frame.FRAME_STATUS:
+                print(f"Flight computer status: {dataset}")
+                continue
+            if telemetry_frame.frame_type(frame) != telemetry_frame.FRAME_SAMPLE:
+                continue
 
             timestamp = dataset[0]
-            temp = dataset[1] - 5.0
+            temp = None if dataset[1] is None else dataset[1] - 5.0
             pressure = dataset[2]
             acc_x, acc_y, acc_z = dataset[3], dataset[4], dataset[5]
             lat, lon = dataset[6], dataset[7]
             fluor = dataset[8]
             rel_alt = dataset[9]
 
-            if display:
+            # Redrawing the OLED takes tens of ms, so only about once a second
+            if display and time.monotonic() - last_display_update >= OLED_REFRESH_INTERVAL:
+                last_display_update = time.monotonic()
                 display.fill(0)
-                display.text(f"Temp: {temp:.1f}C", 0, 0, 1)
-                display.text(f"Press: {pressure:.3f}kPa", 0, 8, 1)
-                display.text(f"Acc: {acc_x:.1f},{acc_y:.1f},{acc_z:.1f}", 0, 16, 1)
-                display.text(f"Lat: {lat:.5f}", 0, 24, 1)
-                display.text(f"Lon: {lon:.5f}", 0, 32, 1)
-                display.text(f"Fluo: {fluor:.2f}", 0, 40, 1)
-                display.text(f"Alt: {rel_alt:.2f}m", 0, 48, 1)
+                display.text(f"Temp: {fmt(temp, '.1f')}C", 0, 0, 1)
+                display.text(f"Press: {fmt(pressure, '.3f')}kPa", 0, 8, 1)
+                display.text(f"Acc: {fmt(acc_x, '.1f')},{fmt(acc_y, '.1f')},{fmt(acc_z, '.1f')}", 0, 16, 1)
+                display.text(f"Lat: {fmt(lat, '.5f')}", 0, 24, 1)
+                display.text(f"Lon: {fmt(lon, '.5f')}", 0, 32, 1)
+                display.text(f"Fluo: {fmt(fluor, '.2f')}", 0, 40, 1)
+                display.text(f"Alt: {fmt(rel_alt, '.2f')}m", 0, 48, 1)
                 display.show()
-                time.sleep(0.01)
 
-    except Exception as e:
-        display_message(display, "Invalid JSON")
-        print(f"Invalid JSON format: {e}")
+        except Exception as e:
+            display_message(display, "Invalid Frame")
+            print(f"Invalid frame: {e}")
 
 #Debugging
 def generate_random_data():
@@ -170,7 +182,8 @@ time.sleep(1)
 display_message(display, "OLED OK")
 time.sleep(1)
 
-lora_uart = busio.UART(board.TX7, board.RX7, baudrate=9600)
+# Room for two full 240-byte LoRa packets between polls of the main loop
+lora_uart = busio.UART(board.TX7, board.RX7, baudrate=9600, receiver_buffer_size=512)
 pc_uart = busio.UART(board.TX, board.RX, baudrate=9600)
 
 if not configure_lora():
@@ -182,26 +195,46 @@ if not configure_lora():
 test_mode = False     # manual JSON input
 random_mode = False  # random data generator
 
+OLED_REFRESH_INTERVAL = 1.0  # seconds between sample readouts on the OLED
+last_display_update = 0.0
+
+# Rebuild frames lost on the link from PICO.py's parity shards (telemetry_fec.py)
+FEC_ENABLED = True
+FEC_REPORT_INTERVAL = 10  # seconds between recovered / lost summaries
+
+# Reassembles binary telemetry frames split across UART reads
+if FEC_ENABLED:
+    frame_parser = telemetry_fec.ParityDecoder()
+else:
+    frame_parser = telemetry_frame.FrameParser()
+last_fec_report = time.monotonic()
+
 while True:
     if test_mode:
         raw = input("Enter sample JSON data: ").strip()
         if raw:
-            process_data(raw)
+            try:
+                data = json.loads(raw)
+                datasets = data if isinstance(data[0], list) else [data]
+                process_data([telemetry_frame.encode(d) for d in datasets])
+            except Exception as e:
+                print(f"Invalid JSON format: {e}")
     elif random_mode:
         random_data = generate_random_data()
-        raw = json.dumps(random_data)
-        print("Generated random data:", raw)
-        process_data(raw)
+        print("Generated random data:", random_data)
+        process_data([telemetry_frame.encode(d) for d in random_data])
         time.sleep(1.0)  # slow down so it's readable
     else:
         if lora_uart.in_waiting:
             try:
-                raw = lora_uart.readline().decode("utf-8", "replace").strip()
-                print(raw)
+                frames = frame_parser.feed(lora_uart.read(lora_uart.in_waiting))
             except Exception as e:
-                display_message(display, "LoRa Decode Error")
-                print(f"LoRa UART decode error: {e}")
-                raw = ""
-            if raw:
-                process_data(raw)
+                display_message(display, "LoRa Read Error")
+                print(f"LoRa UART read error: {e}")
+                frames = []
+            if frames:
+                process_data(frames)
+        if FEC_ENABLED and time.monotonic() - last_fec_report >= FEC_REPORT_INTERVAL:
+            print(frame_parser.report())
+            last_fec_report = time.monotonic()
     time.sleep(0.1)
@@ -1,168 +1,288 @@
-import serial
+import argparse
+import atexit
 import json
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from collections import deque
+import sys
+import time
+import serial
 import numpy as np
-import pandas as pd
 from datetime import datetime
+import telemetry_frame
+import launch_capture
+from serial_reader import SerialReader
+from telemetry_store import TelemetryStore, COLUMNS
+from session_writer import SessionWriter, export_excel
+
+# --- Serial Port Settings (defaults, override with --port / --baud or a --config file) ---
+PORT       = '/dev/tty.usbmodem101'  # <-- change to your port
+BAUD_RATE  = 9600
+MAX_POINTS = 1000  # rolling window
+REFRESH_MS = 100   # plot refresh interval (10 Hz)
+SUMMARY_INTERVAL = 5.0  # seconds between headless throughput summaries
+DOWNLINK_RATE_HZ = 4    # expected sample frames per second (TEENSY.py), for the loss estimate
+LATE_FRAME_WINDOW_MS = 30000  # older timestamps than this mean the flight computer restarted
+SHM_CAPACITY = 65536    # records kept in the shared-memory ring (--shm-name)
+
+# Subplots (5 rows × 2 cols): (title, x column, [(y column, legend label), ...])
+PANELS = [
+    ("Temperature vs Time", 'timestamp', [('temperature', None)]),
+    ("Pressure vs Time", 'timestamp', [('pressure', None)]),
+    ("Ax, Ay, Az vs Time", 'timestamp', [('Ax', 'Ax'), ('Ay', 'Ay'), ('Az', 'Az')]),
+    ("Axyz vs Time", 'timestamp', [('Axyz', None)]),
+    ("Fluorometer vs Time", 'timestamp', [('fluorometer', None)]),
+    ("Relative Altitude vs Time", 'timestamp', [('rel_altitude', None)]),
+    ("Longitude vs Latitude", 'longitude', [('latitude', None)]),
+    ("Fluorometer vs Relative Altitude", 'rel_altitude', [('fluorometer', None)]),
+    ("Fluorometer vs Temperature", 'temperature', [('fluorometer', None)]),
+    ("Fluorometer vs Pressure", 'pressure', [('fluorometer', None)]),
+]
+
+# --- Command line / config file ---
+arg_parser = argparse.ArgumentParser(description="Ground station telemetry viewer and logger")
+arg_parser.add_argument('--config', help="JSON file with any of the options below (keys use underscores)")
+arg_parser.add_argument('--port', default=PORT, help="Serial port of the ground station")
+arg_parser.add_argument('--baud', type=int, default=BAUD_RATE, help="Serial baud rate")
+arg_parser.add_argument('--temp-offset', type=float, default=None,
+                        help="Temperature offset in °C (prompted for when omitted in GUI mode)")
+arg_parser.add_argument('--headless', action='store_true',
+                        help="No plot window: log to disk and print periodic summaries")
+arg_parser.add_argument('--window', type=int, default=MAX_POINTS, help="Points in the live plot window")
+arg_parser.add_argument('--summary-interval', type=float, default=SUMMARY_INTERVAL,
+                        help="Seconds between headless summaries")
+arg_parser.add_argument('--downlink-rate', type=float, default=DOWNLINK_RATE_HZ,
+                        help="Expected sample frames per second (for the loss estimate)")
+arg_parser.add_argument('--shm-name', help="Also publish every row to a shared-memory ring of this name")
+arg_parser.add_argument('--shm-capacity', type=int, default=SHM_CAPACITY, help="Records in the shared-memory ring")
+arg_parser.add_argument('--attach', metavar='SHM_NAME',
+                        help="Plot only: map the ring published by another INTERPRETER.py --shm-name")
+config_args, _ = arg_parser.parse_known_args()
+if config_args.config:
+    with open(config_args.config) as f:
+        arg_parser.set_defaults(**json.load(f))
+args = arg_parser.parse_args()
+
+def run_viewer():
+    # Plotting process: maps the ring zero-copy, no serial port, calibration or logging
+    import matplotlib.pyplot as plt
+    from live_plot import LivePlot
+    from shm_ring import SharedRing
+
+    ring = SharedRing.attach(args.attach)
+    plot = LivePlot(PANELS, 5, 2, figsize=(15, 12))
+    last_sequence = -1
+
+    def update():
+        nonlocal last_sequence
+        sequence = ring.sequence
+        if sequence == last_sequence:
+            return
+        last_sequence = sequence
+        window = ring.window(args.window)
+        plot.update({name: window[name] for name, _ in COLUMNS})
+
+    timer = plot.fig.canvas.new_timer(interval=REFRESH_MS)
+    timer.add_callback(update)
+    timer.start()
+    # The plot lines still hold views into the block, so leave unmapping to process exit
+    plt.show()
+
+if args.attach:
+    run_viewer()
+    sys.exit(0)
 
 # --- User Calibration Prompt ---
-offset_input = input("Enter temperature offset in °C (e.g. -5.0 for sensor calibration): ").strip()
-try:
-    temp_offset = float(offset_input)
-except ValueError:
-    print(f"Invalid offset '{offset_input}', defaulting to 0.0°C")
+if args.temp_offset is not None:
+    temp_offset = args.temp_offset
+elif args.headless:
     temp_offset = 0.0
+else:
+    offset_input = input("Enter temperature offset in °C (e.g. -5.0 for sensor calibration): ").strip()
+    try:
+        temp_offset = float(offset_input)
+    except ValueError:
+        print(f"Invalid offset '{offset_input}', defaulting to 0.0°C")
+        temp_offset = 0.0
 print(f"Using temperature offset: {temp_offset}°C")
 
-# --- Serial Port Settings ---
-PORT       = '/dev/tty.usbmodem101'  # <-- change to your port
-BAUD_RATE  = 9600
-MAX_POINTS = 200  # rolling window
-
-ser = serial.Serial(PORT, BAUD_RATE, timeout=1)
-
-# Data buffers for plotting
-time_data    = deque(maxlen=MAX_POINTS)
-temp_data    = deque(maxlen=MAX_POINTS)
-press_data   = deque(maxlen=MAX_POINTS)
-ax_data      = deque(maxlen=MAX_POINTS)
-ay_data      = deque(maxlen=MAX_POINTS)
-az_data      = deque(maxlen=MAX_POINTS)
-axyz_data    = deque(maxlen=MAX_POINTS)
-lat_data     = deque(maxlen=MAX_POINTS)
-lon_data     = deque(maxlen=MAX_POINTS)
-reading_data = deque(maxlen=MAX_POINTS)
-rel_alt_data = deque(maxlen=MAX_POINTS)
-
-# Will accumulate every parsed row here
-records = []
-
-# Create subplots (5 rows × 2 cols)
-fig, axs = plt.subplots(5, 2, figsize=(15, 12))
-fig.tight_layout(pad=3.0)
-
-def update(frame):
+# serial_for_url also accepts socket://host:port to attach to telemetry_hub.py
+ser = serial.serial_for_url(args.port, args.baud, timeout=1)
+
+# Drains the port and reassembles frames on its own thread, independent of the redraw rate
+reader = SerialReader(ser)
+reader.start()
+# Rebuilds kHz launch captures sent as FRAME_EVENT chunks
+event_assembler = telemetry_frame.EventAssembler()
+
+def save_launch_event(event_id, payload):
+    rate, pre, samples = launch_capture.decode_event(payload)
+    accel = np.array(samples)
+    t_ms = (np.arange(len(samples)) - pre) * 1000.0 / rate
+    now = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"launch_event_{event_id}_{now}.csv"
+    np.savetxt(filename, np.column_stack((t_ms, accel)), delimiter=',',
+               header='t_ms,Ax_g,Ay_g,Az_g', comments='', fmt='%.4f')
+    print(f"🚀 Launch event {event_id}: {len(samples)} samples @ {rate} Hz "
+          f"(peak {np.sqrt((accel ** 2).sum(axis=1)).max():.1f} g) saved to {filename}")
+
+# Rolling plot window and full-session log in preallocated NumPy columns (GUI only)
+store = None if args.headless else TelemetryStore(args.window)
+
+# Every row goes to disk as it arrives (fsync'd at least once a second)
+session_file = f"data_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+session = SessionWriter(session_file, [name for name, _ in COLUMNS])
+atexit.register(session.close)
+print(f"📝 Logging to {session_file}")
+
+# Decoded rows for plotting / analysis processes on other cores (python INTERPRETER.py --attach NAME)
+shared_ring = None
+if args.shm_name:
+    from shm_ring import SharedRing
+    shared_ring = SharedRing.create(args.shm_name, args.shm_capacity)
+    atexit.register(shared_ring.close)
+    print(f"🔗 Publishing to shared memory '{args.shm_name}' ({args.shm_capacity} records)")
+
+# Sample frames received, and frames missing from the (integer ms) timestamp sequence
+sample_frames = 0
+missing_frames = 0
+last_timestamp_ms = None
+
+def process_frames(frames):
+    """Decode, calibrate and log a batch of frames; returns the number of sample rows."""
+    global sample_frames, missing_frames, last_timestamp_ms
+    rows = 0
+    for raw_frame in frames:
+        if telemetry_frame.frame_type(raw_frame) == telemetry_frame.FRAME_STATUS:
+            _, ticks, overruns, jitter_max, _, work_max = telemetry_frame.decode(raw_frame)
+            print(f"⏱️  Flight computer: {ticks} task runs, {overruns} overruns, "
+                  f"jitter max {jitter_max * 1000:.1f} ms, work max {work_max * 1000:.1f} ms")
+            continue
+        if telemetry_frame.frame_type(raw_frame) == telemetry_frame.FRAME_EVENT:
+            event = event_assembler.feed(raw_frame)
+            if event:
+                save_launch_event(*event)
+            continue
+        if telemetry_frame.frame_type(raw_frame) != telemetry_frame.FRAME_SAMPLE:
+            continue
+
+        ts, raw_temp, pressure, Ax, Ay, Az, lat, lon, fluor, rel_alt = telemetry_frame.decode(raw_frame)
+
+        # Gaps in the flight computer's ms timestamps are frames lost on the link
+        if ts is not None:
+            ts_ms = round(ts * 1000)
+            if last_timestamp_ms is not None and 0 < last_timestamp_ms - ts_ms <= LATE_FRAME_WINDOW_MS:
+                # Late frame rebuilt by the ground station's FEC: no longer missing
+                if missing_frames:
+                    missing_frames -= 1
+            else:
+                if (last_timestamp_ms is not None and ts_ms > last_timestamp_ms
+                        and args.downlink_rate > 0):
+                    period_ms = 1000 / args.downlink_rate
+                    gap = round((ts_ms - last_timestamp_ms) / period_ms) - 1
+                    if gap > 0:
+                        missing_frames += gap
+                last_timestamp_ms = ts_ms
+
+        # Fill missing lat/lon with 0.0, other missing values plot as gaps
+        if lat is None: lat = 0.0
+        if lon is None: lon = 0.0
+        ts, raw_temp, pressure, Ax, Ay, Az, fluor, rel_alt = (
+            np.nan if v is None else v
+            for v in (ts, raw_temp, pressure, Ax, Ay, Az, fluor, rel_alt)
+        )
+
+        # Apply user-specified offset
+        temp_calibrated = raw_temp + temp_offset
+        axyz = np.sqrt(Ax**2 + Ay**2 + Az**2)
+
+        row = (ts, temp_calibrated, pressure, Ax, Ay, Az, axyz,
+               lat, lon, fluor, rel_alt)
+        if store is not None:
+            store.append(row)
+        session.write(row)
+        if shared_ring is not None:
+            shared_ring.write(row)
+        rows += 1
+    sample_frames += rows
+    return rows
+
+def print_summary(elapsed, interval_frames):
+    expected = sample_frames + missing_frames
+    loss = 100.0 * missing_frames / expected if expected else 0.0
+    print(f"📊 {interval_frames / elapsed:.1f} frames/s, {reader.bytes_read} bytes, "
+          f"{session.rows} rows logged, backlog {reader.backlog()}, "
+          f"{reader.parser.crc_errors} CRC errors, {reader.parser.skipped_bytes} bytes skipped, "
+          f"~{missing_frames} frames lost ({loss:.1f}%)")
+
+def run_headless():
+    interval_start = time.monotonic()
+    interval_frames = reader.frames_read
     try:
-        line = ser.readline().decode('utf-8').strip()
-        # Replace None with null for valid JSON
-        line = line.replace("None", "null")
+        while reader.is_alive():
+            process_frames(reader.drain())
+            session.poll()
+            now = time.monotonic()
+            if now - interval_start >= args.summary_interval:
+                print_summary(now - interval_start, reader.frames_read - interval_frames)
+                interval_start = now
+                interval_frames = reader.frames_read
+            time.sleep(0.05)
+        print(f"Serial reader stopped: {reader.error}")
+    except KeyboardInterrupt:
+        pass
+    process_frames(reader.drain())
 
-        # Fill missing lat/lon with 0.0
-        line = line.replace("null", "0.0", 2)  # Replace the first two 'null' (lat and lon)
+def run_gui():
+    # Only the GUI pays for importing matplotlib
+    import matplotlib.pyplot as plt
+    from live_plot import LivePlot
 
-        if not line or not line.startswith('['):
-            print(f"⚠️  Skipped non-JSON line: {line}")
-            return
+    # Lines are created once and blitted; axes only redraw when data leaves their limits
+    plot = LivePlot(PANELS, 5, 2, figsize=(15, 12))
+    error_reported = False
 
+    def update():
+        nonlocal error_reported
         try:
-            data = json.loads(line)
-            if len(data) != 10:
-                raise ValueError("wrong length")
-
-            ts, raw_temp, pressure, Ax, Ay, Az, lat, lon, fluor, rel_alt = data
-            # Apply user-specified offset
-            temp_calibrated = raw_temp + temp_offset
-            axyz = np.sqrt(Ax**2 + Ay**2 + Az**2)
-
-            # Append to plotting buffers
-            time_data.append(ts)
-            temp_data.append(temp_calibrated)
-            press_data.append(pressure)
-            ax_data.append(Ax); ay_data.append(Ay); az_data.append(Az)
-            axyz_data.append(axyz)
-            lat_data.append(lat); lon_data.append(lon)
-            reading_data.append(fluor)
-            rel_alt_data.append(rel_alt)
-
-            # Log into our record list\ n        
-            records.append({
-                'timestamp': ts,
-                'temperature': temp_calibrated,
-                'pressure': pressure,
-                'Ax': Ax,
-                'Ay': Ay,
-                'Az': Az,
-                'Axyz': axyz,
-                'latitude': lat,
-                'longitude': lon,
-                'fluorometer': fluor,
-                'rel_altitude': rel_alt
-            })
-
-            # --- redraw each axis ---
-            axs[0, 0].cla()
-            axs[0, 0].plot(time_data, temp_data)
-            axs[0, 0].set_title("Temperature vs Time")
-
-            axs[0, 1].cla()
-            axs[0, 1].plot(time_data, press_data)
-            axs[0, 1].set_title("Pressure vs Time")
-
-            axs[1, 0].cla()
-            axs[1, 0].plot(time_data, ax_data, label='Ax')
-            axs[1, 0].plot(time_data, ay_data, label='Ay')
-            axs[1, 0].plot(time_data, az_data, label='Az')
-            axs[1, 0].set_title("Ax, Ay, Az vs Time")
-            axs[1, 0].legend()
-
-            axs[1, 1].cla()
-            axs[1, 1].plot(time_data, axyz_data)
-            axs[1, 1].set_title("Axyz vs Time")
-
-            axs[2, 0].cla()
-            axs[2, 0].plot(time_data, reading_data)
-            axs[2, 0].set_title("Fluorometer vs Time")
-
-            axs[2, 1].cla()
-            axs[2, 1].plot(time_data, rel_alt_data)
-            axs[2, 1].set_title("Relative Altitude vs Time")
-
-            axs[3, 0].cla()
-            axs[3, 0].plot(lon_data, lat_data)
-            axs[3, 0].set_title("Longitude vs Latitude")
-
-            axs[3, 1].cla()
-            axs[3, 1].plot(rel_alt_data, reading_data)
-            axs[3, 1].set_title("Fluorometer vs Relative Altitude")
-
-            axs[4, 0].cla()
-            axs[4, 0].plot(temp_data, reading_data)
-            axs[4, 0].set_title("Fluorometer vs Temperature")
-
-            axs[4, 1].cla()
-            axs[4, 1].plot(press_data, reading_data)
-            axs[4, 1].set_title("Fluorometer vs Pressure")
-
-            print(f"✅ Successful update : {line}")
-
-        except json.JSONDecodeError:
-            print(f"⚠️  Skipped non-JSON line: {line}")
-            pass
-        except ValueError as e:
-            print(f"⚠️  Skipped invalid data ({e}): {line}")
-            pass
-
-    except:
-        print("Failure")
-    
-# Animate
-ani = animation.FuncAnimation(fig, update, interval=500)
-
-# Show and then confirm before saving
-plt.show()
-
-# Prompt before exit
-confirm = input("Are you sure you want to exit and save data? [y/N]: ").strip().lower()
-if confirm in ('y', 'yes'):
-    if records:
-        # timestamped filename
-        now = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"data_log_{now}.xlsx"
-        pd.DataFrame(records).to_excel(filename, index=False)
-        print(f"\n📄 Saved {len(records)} rows to {filename}")
-    else:
-        print("\n⚠️  No records to save.")
+            backlog = reader.backlog()
+            frames = reader.drain()
+            if reader.error and not error_reported:
+                print(f"Serial reader stopped: {reader.error}")
+                error_reported = True
+            session.poll()
+            if not frames:
+                return
+
+            process_frames(frames)
+
+            # --- push the rolling window to the persistent lines ---
+            plot.update(store.columns())
+
+            print(f"✅ Successful update : {len(frames)} frame(s), backlog {backlog}, "
+                  f"{reader.ingest_rate():.1f} frames/s, {reader.parser.crc_errors} CRC errors")
+
+        except Exception as e:
+            print(f"Update failed: {e}")
+
+    # Refresh from a GUI timer (FuncAnimation would force a full redraw every frame)
+    timer = plot.fig.canvas.new_timer(interval=REFRESH_MS)
+    timer.add_callback(update)
+    timer.start()
+
+    plt.show()
+
+if args.headless:
+    run_headless()
 else:
-    print("\n❌ Exit canceled. Data not saved.")
\ No newline at end of file
+    run_gui()
+
+# Close the session file (already on disk) and offer the Excel export
+reader.stop()
+session.close()
+print(f"\n📄 {session.rows} rows saved to {session_file}")
+
+if session.rows and not args.headless:
+    confirm = input("Export the session to Excel as well? [y/N]: ").strip().lower()
+    if confirm in ('y', 'yes'):
+        filename, rows = export_excel(session_file)
+        print(f"📄 Exported {rows} rows to {filename}")
+    else:
+        print(f"Skipped. Export later with: python session_writer.py {session_file}")
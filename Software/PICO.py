@@ -1,13 +1,45 @@
 import board
 import busio
+import math
 import time
-import json
+import telemetry_frame
+import telemetry_fec
 
 # Initialize UART for DX-LR02 (TX7: pin 28, RX7: pin 29)
 lora_uart = busio.UART(board.GP4, board.GP5, baudrate=9600)
 
 # Initialize UART for data input (UART0: GP0 and GP1)
-data_uart = busio.UART(board.GP0, board.GP1, baudrate=115200)
+# Larger RX buffer so a slow LoRa write never drops incoming frames
+data_uart = busio.UART(board.GP0, board.GP1, baudrate=115200, receiver_buffer_size=1024)
+
+# DX-LR02 air settings: the radio, not the 9600 baud UART, limits throughput.
+# SF8 at 125 kHz carries about 360 B/s in full packets (see lora_air_rate()).
+LORA_SPREADING_FACTOR = 8
+LORA_BANDWIDTH_HZ = 125000   # Module default bandwidth
+LORA_CODING_RATE = 5         # 4/5
+LORA_PREAMBLE_SYMBOLS = 8
+LINK_BUDGET = 0.9            # Share of the air rate the relay may fill; parity only uses what is left
+LINK_BURST = 2.0             # Seconds of unused budget parity may save up (shards come FEC_DEPTH at a time)
+
+# Batching settings
+LORA_MAX_PAYLOAD = 240       # Largest packet the DX-LR02 sends in one go (bytes)
+BATCH_FLUSH_INTERVAL = 0.5   # Send a partial batch once its oldest sample is this old (s)
+BATCH_STATS_INTERVAL = 10    # How often to print batch statistics (s)
+
+# Forward error correction: XOR parity shards let GROUND.py rebuild lost frames
+FEC_ENABLED = True
+FEC_GROUP_SIZE = 8   # Frames per parity shard: 4 = 37%, 6 = 27%, 8 = 22% extra airtime
+FEC_DEPTH = 8        # Interleaving depth, at least the frames per LoRa packet (240 / 30)
+
+# Pass-through frame checks, cheapest first
+VALIDATE_LENGTH = 0   # Only split the stream into FRAME_SIZE chunks
+VALIDATE_HEADER = 1   # Also check the version byte and resync on mismatch
+VALIDATE_CRC = 2      # Also check the CRC-16 and drop corrupted frames
+
+# Pass-through settings
+PASS_THROUGH = True                      # Forward raw frames without decoding them
+PASS_THROUGH_VALIDATION = VALIDATE_HEADER
+RX_BUFFER_SIZE = 512                     # Preallocated relay buffer (bytes)
 
 def send_at_command(cmd, expected, timeout=2.0):
     """Send AT command and check for expected response."""
@@ -52,8 +84,8 @@ def configure_lora():
         return False
     time.sleep(0.5)
 
-    if not send_at_command("AT+SF8", "OK"):  # Set Spreading Factor to 8 (SF6)
-        print("Failed to set Spreading Factor to 8")
+    if not send_at_command(f"AT+SF{LORA_SPREADING_FACTOR}", "OK"):  # Set Spreading Factor
+        print(f"Failed to set Spreading Factor to {LORA_SPREADING_FACTOR}")
         return False
     time.sleep(0.5)
 
@@ -82,44 +114,202 @@ def configure_lora():
         return False
     return True
 
+def lora_air_rate(payload=LORA_MAX_PAYLOAD):
+    """Bytes per second the DX-LR02 sends in back-to-back packets of payload bytes."""
+    # Semtech LoRa time-on-air: explicit header, CRC on, low data rate optimisation above 16 ms symbols
+    sf = LORA_SPREADING_FACTOR
+    symbol_time = (1 << sf) / LORA_BANDWIDTH_HZ
+    low_rate = 2 if symbol_time > 0.016 else 0
+    blocks = math.ceil(max(0, 8 * payload - 4 * sf + 28 + 16) / (4 * (sf - low_rate)))
+    symbols = LORA_PREAMBLE_SYMBOLS + 4.25 + 8 + blocks * LORA_CODING_RATE
+    return payload / (symbols * symbol_time)
+
+class FrameBatcher:
+    """Packs several telemetry frames into one LoRa write to fill each payload."""
+
+    def __init__(self, uart, max_payload, flush_interval):
+        self.uart = uart
+        self.flush_interval = flush_interval
+        self.capacity = max(1, max_payload // telemetry_frame.FRAME_SIZE) * telemetry_frame.FRAME_SIZE
+        self.buffer = bytearray(self.capacity)
+        self.length = 0
+        self.count = 0
+        self.first_arrival = 0.0
+        self.arrival_sum = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.batches = 0
+        self.samples = 0
+        self.bytes_sent = 0
+        self.parity_shards = 0
+        self.fill_sum = 0.0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def add(self, frame, parity=False):
+        """Queue one frame (or parity shard), sending the batch as soon as the payload is full."""
+        size = len(frame)
+        if self.length + size > self.capacity:
+            self.flush()
+        now = time.monotonic()
+        if self.length == 0:
+            self.first_arrival = now
+        self.buffer[self.length:self.length + size] = frame
+        self.length += size
+        if parity:
+            self.parity_shards += 1
+        else:
+            self.count += 1
+            self.arrival_sum += now
+        if self.length + size > self.capacity:
+            self.flush()
+
+    def poll(self):
+        """Send a partial batch once its oldest sample reaches the flush deadline."""
+        if self.length and time.monotonic() - self.first_arrival >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.length:
+            return
+        self.uart.write(memoryview(self.buffer)[:self.length])
+        now = time.monotonic()
+        self.batches += 1
+        self.samples += self.count
+        self.bytes_sent += self.length
+        self.fill_sum += self.length / self.capacity
+        self.latency_sum += self.count * now - self.arrival_sum
+        self.latency_max = max(self.latency_max, now - self.first_arrival)
+        self.length = 0
+        self.count = 0
+        self.arrival_sum = 0.0
+
+    def report(self):
+        """Print fill ratio and per-sample latency since the last report."""
+        if self.batches:
+            print(f"Batches: {self.batches}, samples: {self.samples}, "
+                  f"parity shards: {self.parity_shards}, "
+                  f"fill: {100 * self.fill_sum / self.batches:.0f}%, "
+                  f"latency avg: {1000 * self.latency_sum / max(1, self.samples):.0f} ms, "
+                  f"max: {1000 * self.latency_max:.0f} ms")
+        self.reset_stats()
+
+# Preallocated relay buffer; unfinished frames stay at the front between reads
+rx_buffer = bytearray(RX_BUFFER_SIZE)
+rx_view = memoryview(rx_buffer)
+rx_length = 0
+relay_dropped_bytes = 0
+
+def relay_pass_through():
+    """Read waiting bytes into rx_buffer and queue whole frames without parsing them."""
+    global rx_length, relay_dropped_bytes
+    size = telemetry_frame.FRAME_SIZE
+    space = RX_BUFFER_SIZE - rx_length
+    count = data_uart.readinto(rx_view[rx_length:rx_length + min(data_uart.in_waiting, space)])
+    if not count:
+        return
+    end = rx_length + count
+
+    pos = 0
+    while end - pos >= size:
+        if PASS_THROUGH_VALIDATION >= VALIDATE_HEADER and not telemetry_frame.is_header(rx_buffer, pos):
+            pos += 1
+            relay_dropped_bytes += 1
+            continue
+        if PASS_THROUGH_VALIDATION >= VALIDATE_CRC and not telemetry_frame.is_valid(rx_buffer, pos):
+            pos += 1
+            relay_dropped_bytes += 1
+            continue
+        queue_frame(rx_view[pos:pos + size])
+        pos += size
+
+    # Move the partial frame (always shorter than one frame) to the front
+    rx_length = end - pos
+    for i in range(rx_length):
+        rx_buffer[i] = rx_buffer[pos + i]
+
+def queue_frame(frame):
+    """Queue a frame for the next LoRa packet, followed by any parity shards now due.
+
+    Frames always go out. Parity only spends the airtime they leave free under
+    LINK_BUDGET of the DX-LR02 air rate, so shards are skipped while launch
+    event chunks (or too high a TEENSY.py downlink rate) fill the link.
+    """
+    global air_credit, air_credit_time, parity_skipped
+    now = time.monotonic()
+    air_credit = min(air_credit + (now - air_credit_time) * air_budget, LINK_BURST * air_budget)
+    air_credit_time = now
+    air_credit -= len(frame)
+    batcher.add(frame)
+    if not fec_encoder or not telemetry_fec.protected(frame):
+        return
+    for shard in fec_encoder.add(frame):
+        if air_credit >= len(shard):
+            air_credit -= len(shard)
+            batcher.add(shard, parity=True)
+        else:
+            parity_skipped += 1
+
 # Configure LoRa module
 if not configure_lora():
     print("LoRa configuration failed")
+
+# Reassembles binary telemetry frames split across UART reads
+frame_parser = telemetry_frame.FrameParser()
+batcher = FrameBatcher(lora_uart, LORA_MAX_PAYLOAD, BATCH_FLUSH_INTERVAL)
+fec_encoder = telemetry_fec.ParityEncoder(FEC_GROUP_SIZE, FEC_DEPTH) if FEC_ENABLED else None
+parity_skipped = 0
+
+# Airtime bookkeeping (bytes): credit grows at the budgeted air rate and every queued frame spends it
+air_rate = lora_air_rate()
+air_budget = LINK_BUDGET * air_rate
+air_credit = 0.0
+air_credit_time = time.monotonic()
+print(f"LoRa air rate: {air_rate:.0f} B/s, budget {air_budget:.0f} B/s")
+last_stats_time = time.monotonic()
+
 while True:
     try:
         # Check for incoming data
         if data_uart.in_waiting:
             #print("Data available on UART0")
             try:
-                # Read a line of data
-                data_line = data_uart.readline().decode().strip()
-                #print(f"Raw data received: {data_line}")
-
-                # Parse JSON data
-                try:
-                    data_point = json.loads(data_line)
-                    #print(f"Parsed data: {data_point}")
-                except Exception as e:
-                    #print(f"JSON parsing error: {e}")
-                    continue
-
-                # Prepare message as JSON
-                message = json.dumps(data_point)
-                #print(f"Prepared message: {message}")
-
-                # Send data over LoRa UART
-                lora_uart.write(message.encode('utf-8') + b'\n')
-                #print(f"Sent to LoRa: {message}")
-
-                # Add small delay between transmissions
-                time.sleep(0.05)
+                if PASS_THROUGH:
+                    relay_pass_through()
+                else:
+                    # Read whatever bytes are waiting and pull out complete frames
+                    chunk = data_uart.read(data_uart.in_waiting)
+                    frames = frame_parser.feed(chunk)
+                    #print(f"Raw data received: {chunk}")
+
+                    for frame in frames:
+                        # Queue for the next LoRa packet
+                        queue_frame(frame)
+                        #print(f"Queued for LoRa: {frame}")
             except Exception as e:
                 print(f"Error processing data: {e}")
 
         else:
             #print("No data available on UART0", end='\r')
             #lora_uart.write("NO Data!")
-            time.sleep(0.1)
+            time.sleep(0.01)
+
+        # Send a partial batch if its oldest sample is getting stale
+        batcher.poll()
+
+        if time.monotonic() - last_stats_time >= BATCH_STATS_INTERVAL:
+            load = batcher.bytes_sent / (time.monotonic() - last_stats_time)
+            print(f"Air load: {load:.0f} of {air_rate:.0f} B/s")
+            if load > air_budget:
+                print("Telemetry exceeds the LoRa air budget: lower DOWNLINK_RATE_HZ in TEENSY.py")
+            batcher.report()
+            if fec_encoder:
+                print(f"FEC: {fec_encoder.parity_shards - parity_skipped} parity shards sent, "
+                      f"{parity_skipped} skipped for airtime, {fec_encoder.frames} frames")
+            if relay_dropped_bytes or frame_parser.skipped_bytes:
+                print(f"Dropped bytes: {relay_dropped_bytes + frame_parser.skipped_bytes}")
+            last_stats_time = time.monotonic()
     except Exception as e:
         print(f"General exception in main loop: {e}")
         time.sleep(1)
@@ -1,5 +1,6 @@
 import time
-import json
+import math
+import asyncio
 import board
 import busio
 import adafruit_bme680
@@ -7,22 +8,55 @@ import adafruit_gps
 import adafruit_mpu6050
 import analogio
 from digitalio import DigitalInOut, Direction
-
-# Initialize high-speed I2C bus
-i2c = busio.I2C(board.SCL, board.SDA)
+import telemetry_frame
+from bme680_forced import BME680Forced
+from mpu6050_burst import MPU6050Burst, MPU6050Fifo, I2C_FAST_FREQUENCY
+from launch_capture import LaunchCapture, pack_deltas
+from gps_reader import GPSReader
+from task_runtime import TaskRuntime
+
+# Initialize high-speed I2C bus (400 kHz, set USE_FAST_I2C = False for 100 kHz)
+USE_FAST_I2C = True
+if USE_FAST_I2C:
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FAST_FREQUENCY)
+else:
+    i2c = busio.I2C(board.SCL, board.SDA)
 
 # Initialize sensors
 bme680 = adafruit_bme680.Adafruit_BME680_I2C(i2c)
 bme680.sea_level_pressure = 101325
 
 gps = adafruit_gps.GPS_GtopI2C(i2c, debug=False)
-gps.send_command(b'PMTK314,0,1,2,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0')
-gps.send_command(b'PMTK220,1000')
+
+# Launch capture: 1 kHz accelerometer FIFO drained in bulk, with a
+# pre-trigger window kept around g-spikes (set False for plain polling)
+USE_IMU_FIFO = True
+LAUNCH_TRIGGER_G = 3.0       # |a| that starts a launch/ejection event
+LAUNCH_PRE_TRIGGER = 0.25    # Seconds kept from before the spike
+LAUNCH_POST_TRIGGER = 0.75   # Seconds recorded from the spike on
+MAX_QUEUED_EVENTS = 3        # Events waiting for downlink (later ones are dropped)
+EVENT_PACK_SLICE = 300       # Event values packed per step before yielding to the other tasks
 
 mpu = adafruit_mpu6050.MPU6050(i2c)
-mpu.accelerometer_range = adafruit_mpu6050.Range.RANGE_2_G
+if USE_IMU_FIFO:
+    # Launch and ejection shocks saturate the 2 G range
+    mpu.accelerometer_range = adafruit_mpu6050.Range.RANGE_16_G
+else:
+    mpu.accelerometer_range = adafruit_mpu6050.Range.RANGE_2_G
 mpu.gyro_range = adafruit_mpu6050.GyroRange.RANGE_250_DPS
 
+imu = None
+imu_fifo = None
+launch_capture = None
+if USE_IMU_FIFO:
+    imu_fifo = MPU6050Fifo(mpu)
+    launch_capture = LaunchCapture(imu_fifo.sample_rate_hz, imu_fifo.lsb_per_g,
+                                   LAUNCH_TRIGGER_G, LAUNCH_PRE_TRIGGER, LAUNCH_POST_TRIGGER)
+    imu_fifo.start()
+else:
+    # One 14-byte transaction per IMU sample
+    imu = MPU6050Burst(mpu)
+
 analog_pin = analogio.AnalogIn(board.A1)
 
 blue_light = DigitalInOut(board.D21)
@@ -32,12 +66,32 @@ blue_light.value = False  # Start OFF
 # UART used to send data out to another device
 uart = busio.UART(board.TX, board.RX, baudrate=115200)
 
+# Task rates (each runs as its own asyncio task)
+IMU_RATE_HZ = 100            # MPU6050 acceleration
+IMU_FIFO_DRAIN_HZ = 30       # FIFO drains (~33 samples each at 1 kHz, buffer holds 40)
+PHOTODIODE_RATE_HZ = 200     # Fluorometer photodiode (analogio)
+BME680_POLL_HZ = 50         # How often to check for a finished BME680 conversion
+BME680_GAS_HEATER = False    # Heater off in flight: shorter conversions, no gas reading
+GPS_RATE_HZ = 10             # GPS fix rate (PA1010D maximum)
+GPS_POLL_HZ = 20             # How often to drain the GPS buffer
+GPS_MAX_FIX_AGE = 2.0        # Seconds before a fix is reported as missing
+LORA_AIR_RATE = 360          # Bytes/s the DX-LR02 sends at SF8 / 125 kHz (PICO.py lora_air_rate())
+DOWNLINK_RATE_HZ = 4         # Sample + summary frame pairs sent per second (240 B/s)
+EVENT_CHUNK_RATE_HZ = 2      # Launch event frames sent per second while events wait (60 B/s)
+BLUE_LIGHT_RATE_HZ = 10      # How often the blue light logic checks for a new altitude
+LANDED_SPEED = 0.56          # m/s below which the altitude counts as stopped (0.08 m per old ~7 Hz loop)
+LANDED_WINDOW = 0.14         # Seconds at least between the two readings compared
+STATUS_INTERVAL = 5.0        # Seconds between task status frames
+
 # Onboard LED
 led = DigitalInOut(board.LED)
 led.direction = Direction.OUTPUT
 
+# Drains and parses the GPS buffer without waiting for whole sentences
+gps_reader = GPSReader(gps)
+gps_reader.configure(GPS_RATE_HZ, ("RMC", "GGA"))
+
 # GPS state variables
-last_gps_update = time.monotonic()
 latitude = None
 longitude = None
 
@@ -47,36 +101,235 @@ blue_light_state = False  # False = OFF, True = ON
 timer_active = False  # Timer is initially not active
 ground_altitude = bme680.altitude
 
+# Back-to-back forced-mode conversions that never block the loop
+bme_reader = BME680Forced(bme680, gas_heater=BME680_GAS_HEATER)
+
 # Track the ascent and the maximum altitude reached
 max_altitude = 0  # Track the maximum altitude reached
 ascending = False  # Keep track of whether we are ascending
 
 previous_relative_altitude = None  # Track previous altitude to check if it's stopped changing
+previous_altitude_time = 0.0       # When previous_relative_altitude was read
+
+# Reused for every outgoing telemetry frame
+frame_buffer = bytearray(telemetry_frame.FRAME_SIZE)
+
+# Launch events waiting for downlink, sent chunk by chunk:
+# [event id, payload (or (header, raw values) until packed), next chunk, chunk count (0 until packed)]
+event_queue = []
+events_dropped = 0
+
+class Channel:
+    """Min/max/mean/last of one sensor channel between downlink frames."""
+
+    def __init__(self):
+        self.last = None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add_block(self, count, total, low, high, last):
+        """Fold in count readings summarised by their sum, extremes and newest value."""
+        if self.count:
+            if low < self.min:
+                self.min = low
+            if high > self.max:
+                self.max = high
+        else:
+            self.min = low
+            self.max = high
+        self.total += total
+        self.count += count
+        self.last = last
+
+    def add(self, value):
+        if self.count:
+            if value < self.min:
+                self.min = value
+            elif value > self.max:
+                self.max = value
+        else:
+            self.min = self.max = value
+        self.total += value
+        self.count += 1
+        self.last = value
+
+    def mean(self):
+        """Mean since the last reset, or the last value if nothing new arrived."""
+        if self.count:
+            return self.total / self.count
+        return self.last
+
+# Aggregated readings between downlink frames
+temperature_channel = Channel()
+pressure_channel = Channel()
+altitude_channel = Channel()
+accel_x_channel = Channel()
+accel_y_channel = Channel()
+accel_z_channel = Channel()
+accel_mag_channel = Channel()
+fluor_channel = Channel()
+channels = (temperature_channel, pressure_channel, altitude_channel, accel_x_channel,
+            accel_y_channel, accel_z_channel, accel_mag_channel, fluor_channel)
+
+# Set by sample_bme680, cleared once the blue light logic has seen the reading
+fresh_altitude = False
 
 led.value = True
 time.sleep(5)
 led.value = False
 
-def collect_and_send_data():
-    global blue_light_timer_start, blue_light_state, timer_active, max_altitude, ascending, previous_relative_altitude
-
+def sample_imu():
+    if imu_fifo is not None:
+        drain_imu_fifo()
+        return
     try:
-        timestamp = round(time.monotonic(), 1)
+        accel_x, accel_y, accel_z = imu.read()
+    except OSError as e:
+        print(f"IMU read error: {e}")
+        return
+    add_acceleration(accel_x, accel_y, accel_z)
 
-        # Sensor readings
-        temperature = round(bme680.temperature, 1)
-        pressure = round(bme680.pressure / 10, 1)  # kPa
-        altitude = bme680.altitude
-        relative_altitude = round(altitude - ground_altitude, 2)
-
-        accel_x, accel_y, accel_z = mpu.acceleration
-        accel_x = round(accel_x, 1)
-        accel_y = round(accel_y, 1)
-        accel_z = round(accel_z, 1)
-    except:
-        print(f"\nOS ERROR\n")
-
-    analog_value = analog_pin.value
+def drain_imu_fifo():
+    try:
+        count = imu_fifo.drain()
+    except OSError as e:
+        print(f"IMU FIFO read error: {e}")
+        return
+    if not count:
+        return
+    values = imu_fifo.values(count)
+    for i in range(0, 3 * count, 3):
+        if launch_capture.add_sample(values[i], values[i + 1], values[i + 2]):
+            queue_launch_event()
+    add_acceleration_block(values, imu_fifo.accel_scale)
+
+def add_acceleration_block(values, scale):
+    # One pass of builtins per FIFO drain instead of four Channel.add calls per sample
+    xs = values[0::3]
+    ys = values[1::3]
+    zs = values[2::3]
+    count = len(xs)
+    for channel, axis in ((accel_x_channel, xs), (accel_y_channel, ys), (accel_z_channel, zs)):
+        channel.add_block(count, sum(axis) * scale, min(axis) * scale, max(axis) * scale, axis[-1] * scale)
+    squares = [x * x + y * y + z * z for x, y, z in zip(xs, ys, zs)]
+    accel_mag_channel.add_block(count, sum(map(math.sqrt, squares)) * scale,
+                                math.sqrt(min(squares)) * scale, math.sqrt(max(squares)) * scale,
+                                math.sqrt(squares[-1]) * scale)
+
+def queue_launch_event():
+    global events_dropped
+    # Only copy the raw event here: packing it would hold up the FIFO drain at launch
+    header, values = launch_capture.take()
+    # Re-arm at once: the downlink takes many seconds and the ejection comes soon after launch
+    launch_capture.rearm()
+    if len(event_queue) >= MAX_QUEUED_EVENTS:
+        events_dropped += 1
+        print(f"⚠️ Launch event {launch_capture.events} dropped, {len(event_queue)} still downlinking")
+        return
+    event_queue.append([launch_capture.events, (header, values), 0, 0])
+    print(f"🚀 Launch event {launch_capture.events}: {len(values) // 3} samples captured")
+
+async def pack_launch_event(event):
+    # A slice at a time, yielding in between so the FIFO drain keeps up
+    header, values = event[1]
+    payload = bytearray(header)
+    previous = [0, 0, 0]
+    for start in range(0, len(values), EVENT_PACK_SLICE):
+        pack_deltas(values, min(start + EVENT_PACK_SLICE, len(values)), 3, payload, start, previous)
+        await asyncio.sleep(0)
+    event[1] = payload
+    event[3] = telemetry_frame.event_chunks(payload)
+    print(f"🚀 Launch event {event[0]}: {len(payload)} bytes, {event[3]} frames to send")
+
+async def send_event_chunk():
+    # Paced on its own so events never push the radio past its air rate
+    if not event_queue:
+        return
+    size = telemetry_frame.EVENT_PAYLOAD_SIZE
+    event = event_queue[0]
+    if not event[3]:
+        await pack_launch_event(event)
+    event_id, payload, chunk, chunk_count = event
+    start = chunk * size
+    telemetry_frame.encode_event_chunk(event_id, chunk, chunk_count,
+                                       payload[start:start + size], frame_buffer)
+    uart.write(frame_buffer)
+    event[2] = chunk + 1
+    if event[2] >= chunk_count:
+        # Sent in full: free it and move on to the next queued event
+        event_queue.pop(0)
+
+def add_acceleration(accel_x, accel_y, accel_z):
+    accel_x_channel.add(accel_x)
+    accel_y_channel.add(accel_y)
+    accel_z_channel.add(accel_z)
+    accel_mag_channel.add(math.sqrt(accel_x * accel_x + accel_y * accel_y + accel_z * accel_z))
+
+def sample_photodiode():
+    fluor_channel.add(analog_pin.value)
+
+def sample_bme680():
+    global fresh_altitude
+    try:
+        if not bme_reader.update():
+            return
+    except OSError as e:
+        print(f"BME680 read error: {e}")
+        return
+    temperature_channel.add(bme_reader.temperature)
+    pressure_channel.add(bme_reader.pressure / 10)  # kPa
+    altitude_channel.add(bme_reader.altitude - ground_altitude)
+    fresh_altitude = True
+
+async def update_gps():
+    global latitude, longitude
+    try:
+        # One I2C chunk at a time, yielding in between so the other tasks keep their rate
+        drained = 0
+        while drained < gps_reader.max_bytes:
+            count = gps_reader.step()
+            if not count:
+                break
+            drained += count
+            await asyncio.sleep(0)
+    except OSError as e:
+        print(f"GPS read error: {e}")
+    had_fix = latitude is not None
+    age = gps_reader.fix_age()
+    if age is not None and age <= GPS_MAX_FIX_AGE:
+        latitude = gps_reader.latitude
+        longitude = gps_reader.longitude
+    else:
+        latitude = None
+        longitude = None
+    if latitude is not None and not had_fix:
+        print(f"📍 GPS Fix: lat={latitude}, lon={longitude}")
+    elif latitude is None and had_fix:
+        print("⚠️ No GPS fix")
+
+def rounded(value, digits):
+    return None if value is None else round(value, digits)
+
+async def collect_and_send_data():
+    # Integer ms: the receiver orders frames and finds gaps by timestamp
+    timestamp_ms = time.monotonic_ns() // 1000000
+    timestamp = timestamp_ms / 1000
+
+    # Slow channels report their latest reading, fast channels the interval mean
+    temperature = rounded(temperature_channel.last, 1)
+    pressure = rounded(pressure_channel.last, 1)
+    relative_altitude = rounded(altitude_channel.last, 2)
+    accel_x = rounded(accel_x_channel.mean(), 1)
+    accel_y = rounded(accel_y_channel.mean(), 1)
+    accel_z = rounded(accel_z_channel.mean(), 1)
+    analog_value = fluor_channel.mean()
+    if analog_value is not None:
+        analog_value = int(analog_value)
 
     data_point = [
         timestamp,
@@ -91,18 +344,41 @@ def collect_and_send_data():
         relative_altitude
     ]
 
-    json_data = json.dumps(data_point)
+    summary = [
+        timestamp,
+        accel_mag_channel.min,
+        accel_mag_channel.max,
+        fluor_channel.min,
+        fluor_channel.max,
+        accel_mag_channel.count,
+        fluor_channel.count,
+        temperature_channel.count,
+    ]
+    for channel in channels:
+        channel.reset()
 
-    # Send via UART
-    uart.write(json_data.encode('utf-8') + b'\n')
+    # Send via UART, letting the other tasks run between frames
+    telemetry_frame.encode(data_point, frame_buffer, timestamp_ms=timestamp_ms)
+    uart.write(frame_buffer)
+    await asyncio.sleep(0)
+    telemetry_frame.encode(summary, frame_buffer, telemetry_frame.FRAME_SUMMARY, timestamp_ms)
+    uart.write(frame_buffer)
 
     # Print to serial monitor
-    print(f"Data @ {timestamp}s: {json_data}")
+    print(f"Data @ {timestamp}s: {data_point}")
+
+    # Toggle the LED on every downlink: a steady blink confirms data is going out
+    led.value = not led.value
 
-    # Blink LED to confirm data was sent
-    led.value = True
-    time.sleep(0.05)
-    led.value = False
+def update_blue_light():
+    global blue_light_timer_start, blue_light_state, timer_active, max_altitude, ascending, previous_relative_altitude, fresh_altitude
+    global previous_altitude_time
+
+    # Flight logic only runs on fresh altitude readings
+    if not fresh_altitude:
+        return
+    fresh_altitude = False
+    relative_altitude = round(altitude_channel.last, 2)
 
     # Track maximum altitude reached
     if relative_altitude > max_altitude:
@@ -141,8 +417,17 @@ def collect_and_send_data():
             blue_light_timer_start = time.monotonic()
             print("🔵 Blue light ON (10s passed)")
 
+    # Vertical speed over the real time between readings: conversions finish at their own rate,
+    # and comparing readings at least LANDED_WINDOW apart keeps sensor noise from inflating it
+    now = time.monotonic()
+    elapsed = now - previous_altitude_time
+    if previous_relative_altitude is not None and elapsed < LANDED_WINDOW:
+        return
+    stopped = (previous_relative_altitude is not None
+               and abs(relative_altitude - previous_relative_altitude) / elapsed < LANDED_SPEED)
+
     # Check if the relative altitude has stopped changing (indicating the rocket stopped falling)
-    if previous_relative_altitude is not None and abs(relative_altitude - previous_relative_altitude) < 0.08 and not ascending:
+    if stopped and not ascending:
         # If the altitude hasn't changed by more than 1m, turn the light on
         blue_light.value = True
         print("🔵 Blue light ON (altitude stopped changing)")
@@ -157,21 +442,31 @@ def collect_and_send_data():
 
     # Store the current relative altitude to track for the next loop
     previous_relative_altitude = relative_altitude
-
-while True:
-    collect_and_send_data()
-
-    current_time = time.monotonic()
-    if current_time - last_gps_update >= 1.0:
-        gps.update()
-        if gps.has_fix:
-            latitude = gps.latitude
-            longitude = gps.longitude
-            print(f"📍 GPS Fix: lat={latitude}, lon={longitude}")
-        else:
-            print("⚠️ No GPS fix")
-            latitude = None
-            longitude = None
-        last_gps_update = current_time
-
-    time.sleep(0.1)# Write your code here :-)
+    previous_altitude_time = now
+
+def send_status():
+    status = runtime.status()
+    telemetry_frame.encode(status, frame_buffer, telemetry_frame.FRAME_STATUS,
+                           time.monotonic_ns() // 1000000)
+    uart.write(frame_buffer)
+    print(f"⏱️ Runs: {status[1]}, overruns: {status[2]}, "
+          f"late max: {status[3] * 1000:.1f} ms, work max: {status[5] * 1000:.1f} ms")
+    runtime.report()
+
+# Everything this board sends has to fit through the radio, not just the UART
+if (2 * DOWNLINK_RATE_HZ + EVENT_CHUNK_RATE_HZ) * telemetry_frame.FRAME_SIZE > LORA_AIR_RATE:
+    print("⚠️ Downlink exceeds the LoRa air rate: frames will back up in the radio")
+
+# One asyncio task per job; the GPS drain and the downlink yield between their I/O steps
+runtime = TaskRuntime()
+runtime.every("imu", IMU_FIFO_DRAIN_HZ if USE_IMU_FIFO else IMU_RATE_HZ, sample_imu)
+runtime.every("photodiode", PHOTODIODE_RATE_HZ, sample_photodiode)
+runtime.every("bme680", BME680_POLL_HZ, sample_bme680)
+runtime.every("gps", GPS_POLL_HZ, update_gps)
+runtime.every("downlink", DOWNLINK_RATE_HZ, collect_and_send_data)
+if USE_IMU_FIFO:
+    runtime.every("events", EVENT_CHUNK_RATE_HZ, send_event_chunk)
+runtime.every("blue_light", BLUE_LIGHT_RATE_HZ, update_blue_light)
+runtime.every("status", 1 / STATUS_INTERVAL, send_status)
+
+runtime.run()
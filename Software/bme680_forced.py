@@ -0,0 +1,135 @@
+"""
+Non-blocking BME680 Forced-Mode Reader
+- Triggers one forced-mode conversion and returns immediately
+- Polls the "new data" flag on later calls instead of sleeping in the driver
+- Serves temperature, pressure, humidity, gas and altitude from one cached result
+- Gas heater can be switched off (e.g. during flight) to shorten conversions
+
+Wraps an adafruit_bme680.Adafruit_BME680 instance (library 3.7.x); copy this
+file next to code.py on the device.
+"""
+import struct
+import time
+
+# BME680 registers and bits
+_REG_MEAS_STATUS = 0x1D
+_REG_CTRL_GAS = 0x71
+_REG_CTRL_HUM = 0x72
+_REG_CTRL_MEAS = 0x74
+_REG_CONFIG = 0x75
+_NEW_DATA = 0x80
+_RUN_GAS_BME680 = 0x10
+_RUN_GAS_BME688 = 0x20
+_FORCED_MODE = 0x01
+
+
+class BME680Forced:
+    """
+    Forced-mode state machine on top of the Adafruit BME680 driver
+
+    Call update() every loop; it starts a conversion when idle and picks up
+    the result once the sensor flags new data. Readings are None until the
+    first conversion finishes.
+    """
+
+    def __init__(self, sensor, gas_heater=True, timeout=1.0):
+        """
+        Args:
+            sensor: An initialised adafruit_bme680.Adafruit_BME680 object
+            gas_heater: Run the gas heater (and report gas) on each conversion
+            timeout: Seconds to wait for a conversion before restarting it
+        """
+        self.sensor = sensor
+        self.gas_heater = gas_heater
+        self.timeout = timeout
+        self.busy = False
+        self.started = 0.0
+
+        # Cached result of the last finished conversion
+        self.temperature = None
+        self.pressure = None
+        self.relative_humidity = None
+        self.gas = None
+        self.altitude = None
+        self.timestamp = None
+
+        self.conversions = 0
+        self.timeouts = 0
+
+    def start(self):
+        """Trigger one forced-mode conversion without waiting for it."""
+        sensor = self.sensor
+        sensor._write(_REG_CONFIG, [sensor._filter << 2])
+        sensor._write(_REG_CTRL_HUM, [sensor._humidity_oversample])
+        run_gas = 0
+        if self.gas_heater:
+            run_gas = _RUN_GAS_BME688 if getattr(sensor, "_chip_variant", 0) == 0x01 else _RUN_GAS_BME680
+        sensor._write(_REG_CTRL_GAS, [run_gas])
+        ctrl = (sensor._temp_oversample << 5) | (sensor._pressure_oversample << 2)
+        sensor._write(_REG_CTRL_MEAS, [ctrl | _FORCED_MODE])
+        self.busy = True
+        self.started = time.monotonic()
+
+    def poll(self):
+        """
+        Check whether the running conversion finished
+
+        Returns:
+            True if a new result was stored, False otherwise
+        """
+        if not self.busy:
+            return False
+        if not self.sensor._read_byte(_REG_MEAS_STATUS) & _NEW_DATA:
+            if time.monotonic() - self.started >= self.timeout:
+                self.timeouts += 1
+                self.busy = False
+            return False
+        self._store(self.sensor._read(_REG_MEAS_STATUS, 17))
+        self.busy = False
+        return True
+
+    def update(self):
+        """
+        Poll the running conversion and start the next one when idle
+
+        Returns:
+            True if a new result arrived during this call
+        """
+        ready = self.poll()
+        if not self.busy:
+            self.start()
+        return ready
+
+    def _store(self, data):
+        sensor = self.sensor
+        sensor._adc_pres = _read24(data, 2) / 16
+        sensor._adc_temp = _read24(data, 5) / 16
+        sensor._adc_hum = struct.unpack(">H", bytes(data[8:10]))[0]
+        if getattr(sensor, "_chip_variant", 0) == 0x01:
+            sensor._adc_gas = int(struct.unpack(">H", bytes(data[15:17]))[0] / 64)
+            sensor._gas_range = data[16] & 0x0F
+        else:
+            sensor._adc_gas = int(struct.unpack(">H", bytes(data[13:15]))[0] / 64)
+            sensor._gas_range = data[14] & 0x0F
+
+        calibration = sensor._temp_calibration
+        var1 = (sensor._adc_temp / 8) - (calibration[0] * 2)
+        var2 = (var1 * calibration[1]) / 2048
+        var3 = ((var1 / 2) * (var1 / 2)) / 4096
+        var3 = (var3 * calibration[2] * 16) / 16384
+        sensor._t_fine = int(var2 + var3)
+
+        # Mark the data fresh so the driver properties below reuse it
+        # instead of starting their own blocking conversion
+        sensor._last_reading = time.monotonic()
+        self.temperature = sensor.temperature
+        self.pressure = sensor.pressure
+        self.relative_humidity = sensor.relative_humidity
+        self.gas = sensor.gas if self.gas_heater else None
+        self.altitude = sensor.altitude
+        self.timestamp = sensor._last_reading
+        self.conversions += 1
+
+
+def _read24(data, offset):
+    return (data[offset] << 16 | data[offset + 1] << 8 | data[offset + 2]) & 0xFFFFFF
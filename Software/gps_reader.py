@@ -0,0 +1,210 @@
+"""
+Incremental GPS Reader
+- Drains every byte the GPS has queued on each call, in bulk reads
+- Parses GGA / RMC sentences as soon as they complete, never waits for a line
+- Keeps the freshest fix and its age
+- Configures the module to send only the needed sentences at up to 10 Hz
+
+Uses an adafruit_gps.GPS (UART) or adafruit_gps.GPS_GtopI2C object (library
+3.x) for its transport and send_command(); copy this file next to code.py
+on the device.
+"""
+import time
+
+# PMTK314 sentence slots, in command order (13 more slots follow, all unused here)
+_PMTK314_SENTENCES = ("GLL", "RMC", "VTG", "GGA", "GSA", "GSV")
+_PMTK314_UNUSED = ",0" * 13
+
+_MAX_LINE = 96      # NMEA sentences are at most 82 characters
+_I2C_CHUNK = 32     # The PA1010D pads reads with \n once its buffer is empty
+_UART_CHUNK = 64
+
+
+class GPSReader:
+    """
+    Non-blocking NMEA reader on top of an Adafruit GPS object
+
+    Call update() every loop, or step() repeatedly to drain one chunk at a
+    time. latitude / longitude / altitude_m / speed_knots / satellites hold
+    the last fix; fix_age() says how old it is.
+    """
+
+    def __init__(self, gps, max_bytes=512):
+        """
+        Args:
+            gps: An adafruit_gps.GPS or adafruit_gps.GPS_GtopI2C object
+            max_bytes: Most bytes drained per update() call
+        """
+        self.gps = gps
+        self._uart = getattr(gps, "_uart", None)
+        self._i2c = getattr(gps, "_i2c", None) if self._uart is None else None
+        self._chunk = bytearray(_I2C_CHUNK if self._i2c is not None else _UART_CHUNK)
+        self._chunk_view = memoryview(self._chunk)
+        self._line = bytearray(_MAX_LINE)
+        self._length = 0
+        self.max_bytes = max_bytes
+
+        # Freshest fix
+        self.has_fix = False
+        self.fix_quality = 0
+        self.latitude = None
+        self.longitude = None
+        self.altitude_m = None
+        self.speed_knots = None
+        self.satellites = None
+        self.fix_time = None
+
+        self.sentences = 0
+        self.checksum_errors = 0
+        self.overflows = 0
+
+    def configure(self, rate_hz=1, sentences=("RMC", "GGA")):
+        """
+        Select the NMEA sentences and the fix rate
+
+        At 9600 baud GGA + RMC fit up to about 5 Hz; the I2C PA1010D manages 10 Hz.
+
+        Args:
+            rate_hz: Fix / output rate, 1 to 10 Hz
+            sentences: Sentence types to enable (GLL, RMC, VTG, GGA, GSA, GSV)
+        """
+        slots = ",".join("1" if name in sentences else "0" for name in _PMTK314_SENTENCES)
+        self.gps.send_command(("PMTK314," + slots + _PMTK314_UNUSED).encode())
+        self.gps.send_command(("PMTK220," + str(1000 // max(1, min(rate_hz, 10)))).encode())
+
+    def fix_age(self):
+        """Seconds since the last fix was received, or None if there was none."""
+        if self.fix_time is None:
+            return None
+        return time.monotonic() - self.fix_time
+
+    def update(self):
+        """
+        Read whatever the GPS has queued and parse the completed sentences
+
+        Returns:
+            True if a new fix arrived during this call
+        """
+        fixes = 0
+        drained = 0
+        while drained < self.max_bytes:
+            count = self._read_chunk()
+            if not count:
+                break
+            drained += count
+            fixes += self._feed(count)
+        return fixes > 0
+
+    def step(self):
+        """
+        Read and parse one chunk (32 bytes over I2C, up to 64 over UART)
+
+        Returns:
+            Number of bytes read, 0 once the GPS has nothing queued
+        """
+        count = self._read_chunk()
+        if count:
+            self._feed(count)
+        return count
+
+    def _read_chunk(self):
+        if self._uart is not None:
+            waiting = self._uart.in_waiting
+            if not waiting:
+                return 0
+            return self._uart.readinto(self._chunk_view[:min(waiting, len(self._chunk))]) or 0
+        with self._i2c as i2c:
+            i2c.readinto(self._chunk)
+        # A chunk of nothing but padding means the module has no more data
+        if self._chunk.count(b"\n") == len(self._chunk):
+            return 0
+        return len(self._chunk)
+
+    def _feed(self, count):
+        chunk = self._chunk
+        line = self._line
+        fixes = 0
+        start = 0
+        while start < count:
+            end = chunk.find(b"\n", start, count)
+            stop = count if end < 0 else end
+            size = stop - start
+            if self._length + size > _MAX_LINE:
+                # Runaway line (lost \n): drop it
+                self.overflows += 1
+                self._length = 0
+            elif size:
+                line[self._length:self._length + size] = chunk[start:stop]
+                self._length += size
+            if end < 0:
+                break
+            start = end + 1
+            # Sentences end in \r\n; a bare \n is PA1010D padding
+            if self._length and line[self._length - 1] == 0x0D:
+                if self._parse(self._length - 1):
+                    fixes += 1
+                self._length = 0
+        return fixes
+
+    def _parse(self, length):
+        line = self._line
+        begin = line.find(b"$", 0, length)
+        star = line.find(b"*", begin, length)
+        if begin < 0 or star < 0 or star + 3 > length:
+            self.checksum_errors += 1
+            return False
+        checksum = 0
+        for i in range(begin + 1, star):
+            checksum ^= line[i]
+        try:
+            expected = int(str(line[star + 1:star + 3], "ascii"), 16)
+        except ValueError:
+            expected = -1
+        if checksum != expected:
+            self.checksum_errors += 1
+            return False
+
+        self.sentences += 1
+        fields = str(line[begin + 1:star], "ascii").split(",")
+        kind = fields[0][2:]
+        try:
+            if kind == "GGA" and len(fields) >= 10:
+                return self._parse_gga(fields)
+            if kind == "RMC" and len(fields) >= 8:
+                return self._parse_rmc(fields)
+        except ValueError:
+            self.checksum_errors += 1
+        return False
+
+    def _parse_gga(self, fields):
+        self.fix_quality = int(fields[6] or 0)
+        self.satellites = int(fields[7]) if fields[7] else None
+        if not self.fix_quality:
+            self.has_fix = False
+            return False
+        self._store_position(fields[2], fields[3], fields[4], fields[5])
+        self.altitude_m = float(fields[9]) if fields[9] else None
+        return True
+
+    def _parse_rmc(self, fields):
+        if fields[2] != "A":
+            self.has_fix = False
+            return False
+        self._store_position(fields[3], fields[4], fields[5], fields[6])
+        self.speed_knots = float(fields[7]) if fields[7] else None
+        return True
+
+    def _store_position(self, lat, lat_dir, lon, lon_dir):
+        self.latitude = _degrees(lat, lat_dir)
+        self.longitude = _degrees(lon, lon_dir)
+        self.has_fix = True
+        self.fix_time = time.monotonic()
+
+
+def _degrees(value, direction):
+    # NMEA ddmm.mmmm / dddmm.mmmm -> signed decimal degrees
+    dot = value.find(".")
+    if dot < 0:
+        dot = len(value)
+    degrees = int(value[:dot - 2]) + float(value[dot - 2:]) / 60
+    return -degrees if direction in ("S", "W") else degrees
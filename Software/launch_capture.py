@@ -0,0 +1,206 @@
+"""
+Launch Event Capture
+- Keeps the last pre_trigger seconds of raw FIFO acceleration in an array ring
+- A g-spike freezes that window and records post_trigger seconds after it
+- The finished event is delta + zigzag varint packed for downlink in
+  telemetry_frame FRAME_EVENT chunks; decode_event() undoes it on the ground
+- take() copies the raw event out in one step, so packing can be spread
+  over several pack_deltas() calls after the capture is re-armed
+- Works on CircuitPython (copy this file next to code.py) and CPython
+"""
+import struct
+from array import array
+
+# Event payload header: sample rate (Hz), LSB per g, pre-trigger samples, total samples
+EVENT_HEADER = "<HHHH"
+EVENT_HEADER_SIZE = struct.calcsize(EVENT_HEADER)
+
+# Capture states
+IDLE = 0        # filling the pre-trigger ring, watching for a spike
+RECORDING = 1   # spike seen, filling the post-trigger part of the event
+READY = 2       # event complete, waiting to be downlinked
+
+
+class LaunchCapture:
+    """
+    Pre/post-trigger recorder for raw (x, y, z) accelerometer counts
+
+    Call add_sample() for every FIFO sample; once state is READY, copy the
+    event out with take() (or pack() it in one go) and call rearm() straight
+    away, so the next event can be captured while this one is sent.
+    """
+
+    def __init__(self, sample_rate_hz, lsb_per_g, trigger_g=3.0, pre_trigger=0.25, post_trigger=0.75):
+        """
+        Args:
+            sample_rate_hz: FIFO sample rate
+            lsb_per_g: Accelerometer counts per g for the configured range
+            trigger_g: |a| (in g) that starts an event
+            pre_trigger: Seconds kept from before the spike
+            post_trigger: Seconds recorded from the spike on
+        """
+        self.sample_rate_hz = sample_rate_hz
+        self.lsb_per_g = lsb_per_g
+        self.pre_samples = max(1, int(pre_trigger * sample_rate_hz))
+        self.post_samples = max(1, int(post_trigger * sample_rate_hz))
+        threshold = trigger_g * lsb_per_g
+        self.threshold_sq = int(threshold * threshold)
+
+        self.ring = array("h", [0] * (3 * self.pre_samples))
+        self.ring_pos = 0
+        self.ring_fill = 0
+        self.event = array("h", [0] * (3 * (self.pre_samples + self.post_samples)))
+        self.event_pos = 0
+        self.event_pre = 0
+
+        self.state = IDLE
+        self.events = 0
+
+    def add_sample(self, x, y, z):
+        """
+        Add one raw sample
+
+        Returns:
+            True when this sample completed an event
+        """
+        if self.state == RECORDING:
+            event = self.event
+            pos = self.event_pos
+            event[pos] = x
+            event[pos + 1] = y
+            event[pos + 2] = z
+            self.event_pos = pos + 3
+            if self.event_pos >= len(event):
+                self.state = READY
+                self.events += 1
+                return True
+            return False
+
+        if self.state == IDLE and x * x + y * y + z * z >= self.threshold_sq:
+            self._trigger()
+            return self.add_sample(x, y, z)
+
+        ring = self.ring
+        pos = self.ring_pos
+        ring[pos] = x
+        ring[pos + 1] = y
+        ring[pos + 2] = z
+        pos += 3
+        self.ring_pos = 0 if pos >= len(ring) else pos
+        if self.ring_fill < self.pre_samples:
+            self.ring_fill += 1
+        return False
+
+    def _trigger(self):
+        # Copy the ring oldest-first to the start of the event
+        ring = self.ring
+        count = 3 * self.ring_fill
+        start = (self.ring_pos - count) % len(ring)
+        event = self.event
+        for i in range(count):
+            event[i] = ring[(start + i) % len(ring)]
+        self.event_pos = count
+        self.event_pre = self.ring_fill
+        self.state = RECORDING
+
+    def take(self):
+        """
+        Copy the finished event out without packing it
+
+        Returns:
+            (EVENT_HEADER bytes, array of the raw interleaved x, y, z counts);
+            pack_deltas(values, len(values), 3, bytearray(header)) gives the
+            same payload as pack()
+        """
+        header = struct.pack(EVENT_HEADER, self.sample_rate_hz, self.lsb_per_g,
+                             self.event_pre, self.event_pos // 3)
+        return header, self.event[:self.event_pos]
+
+    def pack(self):
+        """
+        Compress the finished event
+
+        Returns:
+            bytearray of EVENT_HEADER followed by the packed samples
+        """
+        header, values = self.take()
+        return pack_deltas(values, len(values), 3, bytearray(header))
+
+    def rearm(self):
+        """Drop the finished event and watch for the next spike."""
+        self.ring_pos = 0
+        self.ring_fill = 0
+        self.event_pos = 0
+        self.event_pre = 0
+        self.state = IDLE
+
+
+def pack_deltas(values, count, stride, out, start=0, previous=None):
+    """
+    Append values[start:count] to out as zigzag varints of per-channel differences
+
+    Args:
+        values: Interleaved integer samples (stride channels per sample)
+        count: Index after the last value to pack
+        stride: Number of interleaved channels
+        out: bytearray to append to
+        start: First value to pack, to continue a pack done in slices
+        previous: Last value of each channel, updated in place; pass the same
+            list to every slice of one pack (None starts from zero)
+    """
+    if previous is None:
+        previous = [0] * stride
+    for i in range(start, count):
+        channel = i % stride
+        value = values[i]
+        delta = value - previous[channel]
+        previous[channel] = value
+        delta = delta << 1 if delta >= 0 else ((-delta) << 1) - 1
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return out
+
+
+def unpack_deltas(data, offset, stride):
+    """Inverse of pack_deltas() for data[offset:]; returns a list of values"""
+    previous = [0] * stride
+    values = []
+    delta = 0
+    shift = 0
+    for i in range(offset, len(data)):
+        byte = data[i]
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        delta = delta >> 1 if not delta & 1 else -((delta + 1) >> 1)
+        channel = len(values) % stride
+        previous[channel] += delta
+        values.append(previous[channel])
+        delta = 0
+        shift = 0
+    return values
+
+
+def decode_event(payload):
+    """
+    Unpack an event produced by LaunchCapture.pack()
+
+    Returns:
+        (sample_rate_hz, pre_trigger_samples, samples) where samples is a list
+        of (x, y, z) accelerations in g
+
+    Raises:
+        ValueError: If the payload is truncated
+    """
+    rate, lsb_per_g, pre, count = struct.unpack_from(EVENT_HEADER, payload, 0)
+    values = unpack_deltas(payload, EVENT_HEADER_SIZE, 3)
+    if len(values) != 3 * count:
+        raise ValueError("truncated launch event")
+    samples = [
+        (values[i] / lsb_per_g, values[i + 1] / lsb_per_g, values[i + 2] / lsb_per_g)
+        for i in range(0, len(values), 3)
+    ]
+    return rate, pre, samples
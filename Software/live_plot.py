@@ -0,0 +1,121 @@
+"""
+Blitted Live Plot
+- Creates every Line2D, title and legend once
+- Per refresh only calls set_data() and blits the lines over a cached background
+- Axis limits change only when data leaves them; only then is the full figure redrawn
+- Refresh cost no longer depends on the rolling window length
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+class LivePlot:
+    """
+    Grid of live line plots fed from named data columns
+
+    Each panel is (title, x column, [(y column, legend label or None), ...]).
+    Call update(columns) with a mapping of column name -> 1-D array.
+    """
+
+    def __init__(self, panels, nrows, ncols, figsize=(15, 12), x_headroom=0.25, y_margin=0.1):
+        """
+        Args:
+            panels: Panel specs in row-major order, see the class docstring
+            nrows, ncols: Subplot grid shape
+            figsize: Figure size in inches
+            x_headroom: Fraction of the x span added ahead of the newest x
+                value when rescaling, so scrolling data rescales rarely
+            y_margin: Fraction of the y span added on both sides when rescaling
+        """
+        self.fig, axs = plt.subplots(nrows, ncols, figsize=figsize)
+        self.fig.tight_layout(pad=3.0)
+        self.canvas = self.fig.canvas
+        self.x_headroom = x_headroom
+        self.y_margin = y_margin
+        self.rescales = 0
+
+        # (axes, x column, [(line, y column), ...])
+        self.panels = []
+        for ax, (title, x_key, series) in zip(np.ravel(axs), panels):
+            ax.set_title(title)
+            lines = []
+            for y_key, label in series:
+                line, = ax.plot([], [], label=label, animated=True)
+                lines.append((line, y_key))
+            if any(label for _, label in series):
+                ax.legend(loc="upper left")
+            self.panels.append((ax, x_key, lines))
+
+        self._background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # Full redraw happened (first show, resize, rescale): re-cache the background
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for ax, _, lines in self.panels:
+            for line, _ in lines:
+                ax.draw_artist(line)
+
+    def update(self, columns):
+        """
+        Push new data to every line and refresh the figure
+
+        Args:
+            columns: Mapping of column name -> 1-D array (views are fine)
+        """
+        rescale = False
+        for ax, x_key, lines in self.panels:
+            x = columns[x_key]
+            for line, y_key in lines:
+                line.set_data(x, columns[y_key])
+            if self._needs_rescale(ax, x, [columns[y_key] for _, y_key in lines]):
+                rescale = True
+
+        if rescale or self._background is None:
+            self.rescales += 1
+            self.canvas.draw()  # re-caches the background via _on_draw
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_lines()
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+
+    def _needs_rescale(self, ax, x, ys):
+        x_range = _finite_range(x)
+        y_range = None
+        for y in ys:
+            y_range = _merge(y_range, _finite_range(y))
+        if x_range is None or y_range is None:
+            return False
+
+        changed = False
+        x_low, x_high = ax.get_xlim()
+        if x_range[0] < x_low or x_range[1] > x_high:
+            span = (x_range[1] - x_range[0]) or 1.0
+            ax.set_xlim(x_range[0], x_range[1] + span * self.x_headroom)
+            changed = True
+        y_low, y_high = ax.get_ylim()
+        if y_range[0] < y_low or y_range[1] > y_high:
+            margin = ((y_range[1] - y_range[0]) or 1.0) * self.y_margin
+            ax.set_ylim(y_range[0] - margin, y_range[1] + margin)
+            changed = True
+        return changed
+
+
+def _finite_range(values):
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+    if not finite.size:
+        return None
+    return finite.min(), finite.max()
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), max(a[1], b[1])
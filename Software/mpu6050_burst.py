@@ -0,0 +1,158 @@
+"""
+MPU6050 Burst Reader
+- Reads ACCEL_XOUT_H..GYRO_ZOUT_L (14 bytes) in one I2C transaction
+- Converts acceleration, temperature and gyro together from one buffer
+- Preallocated buffers, no per-read register objects
+- Optional accelerometer FIFO capture at up to 1 kHz, drained in bulk reads
+
+Wraps an adafruit_mpu6050.MPU6050 instance; copy this file next to code.py
+on the device. Use I2C_FAST_FREQUENCY when creating the bus to cut the
+transfer time further.
+"""
+import struct
+
+# 400 kHz fast-mode I2C, supported by the MPU6050, BME680, PA1010D and SSD1306
+I2C_FAST_FREQUENCY = 400000
+
+_REG_SMPLRT_DIV = 0x19
+_REG_CONFIG = 0x1A
+_REG_FIFO_EN = 0x23
+_REG_ACCEL_XOUT_H = 0x3B
+_REG_USER_CTRL = 0x6A
+_REG_FIFO_COUNT_H = 0x72
+_REG_FIFO_R_W = 0x74
+_ACCEL_FIFO_EN = 0x08
+_USER_FIFO_EN = 0x40
+_USER_FIFO_RESET = 0x04
+_FIFO_SIZE = 1024
+_DLPF_184_HZ = 1  # gyro output rate 1 kHz, the FIFO sample clock
+_STANDARD_GRAVITY = 9.80665
+_DEG_TO_RAD = 0.017453292519943295
+
+# LSB per g / per deg/s for each adafruit_mpu6050 Range / GyroRange value
+_ACCEL_LSB = (16384, 8192, 4096, 2048)
+_GYRO_LSB = (131.0, 65.5, 32.8, 16.4)
+
+
+class MPU6050Burst:
+    """
+    Single-transaction reads of all seven MPU6050 measurements
+
+    After read(), acceleration (m/s^2), gyro (rad/s) and temperature (C)
+    hold the values from the same sample instant, matching the units of the
+    Adafruit driver properties.
+    """
+
+    def __init__(self, mpu):
+        """
+        Args:
+            mpu: An initialised adafruit_mpu6050.MPU6050 object
+        """
+        self.device = mpu.i2c_device
+        self.mpu = mpu
+        self._register = bytearray((_REG_ACCEL_XOUT_H,))
+        self._buffer = bytearray(14)
+        self.acceleration = (0.0, 0.0, 0.0)
+        self.gyro = (0.0, 0.0, 0.0)
+        self.temperature = 0.0
+        self.refresh_scale()
+
+    def refresh_scale(self):
+        """Re-read the configured ranges; call after changing either range."""
+        self._accel_scale = _STANDARD_GRAVITY / _ACCEL_LSB[self.mpu.accelerometer_range]
+        self._gyro_scale = _DEG_TO_RAD / _GYRO_LSB[self.mpu.gyro_range]
+
+    def read(self):
+        """
+        Burst-read and convert one sample
+
+        Returns:
+            The (x, y, z) acceleration tuple in m/s^2
+        """
+        with self.device as i2c:
+            i2c.write_then_readinto(self._register, self._buffer)
+        ax, ay, az, temp, gx, gy, gz = struct.unpack(">hhhhhhh", self._buffer)
+        accel_scale = self._accel_scale
+        gyro_scale = self._gyro_scale
+        self.acceleration = (ax * accel_scale, ay * accel_scale, az * accel_scale)
+        self.temperature = temp / 340.0 + 36.53
+        self.gyro = (gx * gyro_scale, gy * gyro_scale, gz * gyro_scale)
+        return self.acceleration
+
+
+class MPU6050Fifo:
+    """
+    Accelerometer-only FIFO capture drained in bulk reads
+
+    The MPU6050 queues 6-byte accel samples at 1 kHz / (1 + divisor); each
+    drain() pulls everything queued (up to max_samples) in one transaction.
+    Samples are raw big-endian int16 counts; multiply by accel_scale for m/s^2.
+    """
+
+    def __init__(self, mpu, sample_rate_divisor=0, max_samples=40):
+        """
+        Args:
+            mpu: An initialised adafruit_mpu6050.MPU6050 object
+            sample_rate_divisor: FIFO rate is 1000 / (1 + divisor) Hz
+            max_samples: Most samples read per drain() call
+        """
+        self.device = mpu.i2c_device
+        self.sample_rate_hz = 1000 // (1 + sample_rate_divisor)
+        self.lsb_per_g = _ACCEL_LSB[mpu.accelerometer_range]
+        self.accel_scale = _STANDARD_GRAVITY / self.lsb_per_g
+        self.buffer = bytearray(6 * max_samples)
+        self._view = memoryview(self.buffer)
+        self._register = bytearray(1)
+        self._count = bytearray(2)
+        self.max_samples = max_samples
+        self.samples = 0
+        self.overflows = 0
+
+        self._write(_REG_CONFIG, _DLPF_184_HZ)
+        self._write(_REG_SMPLRT_DIV, sample_rate_divisor)
+
+    def _write(self, register, value):
+        with self.device as i2c:
+            i2c.write(bytes((register, value)))
+
+    def start(self):
+        """Clear the FIFO and start queueing accelerometer samples."""
+        self._write(_REG_USER_CTRL, _USER_FIFO_RESET)
+        self._write(_REG_FIFO_EN, _ACCEL_FIFO_EN)
+        self._write(_REG_USER_CTRL, _USER_FIFO_EN)
+
+    def stop(self):
+        self._write(_REG_FIFO_EN, 0)
+        self._write(_REG_USER_CTRL, 0)
+
+    def drain(self):
+        """
+        Read queued samples into buffer
+
+        Returns:
+            Number of samples now in buffer (read them with sample())
+        """
+        self._register[0] = _REG_FIFO_COUNT_H
+        with self.device as i2c:
+            i2c.write_then_readinto(self._register, self._count)
+        queued = (self._count[0] << 8) | self._count[1]
+        if queued >= _FIFO_SIZE:
+            # Overflowed and possibly misaligned: drop it and start clean
+            self.overflows += 1
+            self.start()
+            return 0
+        count = min(queued // 6, self.max_samples)
+        if count:
+            self._register[0] = _REG_FIFO_R_W
+            with self.device as i2c:
+                i2c.write_then_readinto(self._register, self._view[:6 * count])
+            self.samples += count
+        return count
+
+    def sample(self, index):
+        """Raw (x, y, z) counts of the index-th sample from the last drain()."""
+        return struct.unpack_from(">hhh", self.buffer, 6 * index)
+
+    def values(self, count):
+        """Raw counts of the first count samples, unpacked at once as x0, y0, z0, x1, ..."""
+        return struct.unpack_from(">%dh" % (3 * count), self.buffer)
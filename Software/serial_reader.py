@@ -0,0 +1,83 @@
+"""
+Background Serial Reader
+- Drains the serial port continuously on its own thread
+- Splits the stream into telemetry frames as bytes arrive
+- Hands frames to the GUI thread through a lock-free deque
+- Reports backlog depth and ingest rate so display latency can be watched
+"""
+import threading
+import time
+from collections import deque
+
+import telemetry_frame
+
+
+class SerialReader(threading.Thread):
+    """
+    Reader thread feeding a telemetry_frame.FrameParser
+
+    deque.append / popleft are atomic in CPython, so the reader and the
+    consumer never take a lock. Call drain() from the consumer to take every
+    pending frame.
+    """
+
+    def __init__(self, ser, rate_window=5.0):
+        """
+        Args:
+            ser: An open serial.Serial (or any object with read() / in_waiting)
+            rate_window: Seconds averaged by ingest_rate()
+        """
+        super().__init__(name="serial-reader", daemon=True)
+        self.ser = ser
+        self.parser = telemetry_frame.FrameParser()
+        self.rate_window = rate_window
+        self._frames = deque()
+        self._stop_event = threading.Event()
+        self._arrivals = deque()
+        self.frames_read = 0
+        self.frames_taken = 0
+        self.bytes_read = 0
+        self.error = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:  # port unplugged or closed
+                self.error = e
+                break
+            if not data:
+                continue
+            self.bytes_read += len(data)
+            frames = self.parser.feed(data)
+            if frames:
+                self._frames.extend(frames)
+                self.frames_read += len(frames)
+                self._arrivals.append((time.monotonic(), len(frames)))
+
+    def stop(self, timeout=2.0):
+        """Ask the thread to finish after its current read and wait for it."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def drain(self):
+        """Take every pending frame, oldest first."""
+        frames = []
+        pop = self._frames.popleft
+        for _ in range(len(self._frames)):
+            frames.append(pop())
+        self.frames_taken += len(frames)
+        return frames
+
+    def backlog(self):
+        """Frames received but not yet taken by drain()."""
+        return len(self._frames)
+
+    def ingest_rate(self):
+        """Frames per second received over the last rate_window seconds."""
+        cutoff = time.monotonic() - self.rate_window
+        arrivals = self._arrivals
+        while arrivals and arrivals[0][0] < cutoff:
+            arrivals.popleft()
+        return sum(count for _, count in list(arrivals)) / self.rate_window
@@ -0,0 +1,107 @@
+"""
+Crash-Safe Session Writer
+- Appends every telemetry row to a CSV file from the first sample on
+- Group commit: flush + fsync at most every commit_interval seconds or commit_rows rows
+- A crash loses at most the last commit window, closing is instant
+- Excel export is a separate post-step from the CSV file
+
+Usage (post-step):
+    python session_writer.py data_log_20250101_120000.csv [output.xlsx]
+"""
+import argparse
+import csv
+import os
+import time
+
+
+class SessionWriter:
+    """
+    Append-only CSV writer with periodic fsync
+
+    Call write() per row and poll() regularly (e.g. every GUI tick) so a
+    quiet link still gets its last rows committed.
+    """
+
+    def __init__(self, path, columns, commit_interval=1.0, commit_rows=500):
+        """
+        Args:
+            path: CSV file to append to (created with a header row if new)
+            columns: Header names
+            commit_interval: Longest time rows stay uncommitted, in seconds
+            commit_rows: Commit early once this many rows are pending
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self.commit_rows = commit_rows
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.rows = 0
+        self.commits = 0
+        self.pending = 0
+        self.last_commit = time.monotonic()
+        if self.file.tell() == 0:
+            self.writer.writerow(columns)
+            self.commit()
+
+    def write(self, row):
+        """Append one row; commits when a commit is due."""
+        self.writer.writerow(row)
+        self.rows += 1
+        self.pending += 1
+        if self.pending >= self.commit_rows:
+            self.commit()
+        else:
+            self.poll()
+
+    def poll(self):
+        """Commit pending rows if the commit interval has passed."""
+        if self.pending and time.monotonic() - self.last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        """Flush and fsync everything written so far."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_commit = time.monotonic()
+        self.commits += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.commit()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_excel(csv_path, xlsx_path=None):
+    """
+    Convert a session CSV file to Excel
+
+    Returns:
+        (xlsx path, number of rows)
+    """
+    import pandas as pd
+    if xlsx_path is None:
+        xlsx_path = os.path.splitext(csv_path)[0] + '.xlsx'
+    data = pd.read_csv(csv_path)
+    data.to_excel(xlsx_path, index=False)
+    return xlsx_path, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a telemetry session CSV to Excel')
+    parser.add_argument('csv_path', help='Session CSV written by INTERPRETER.py')
+    parser.add_argument('xlsx_path', nargs='?', help='Output file (default: next to the CSV)')
+    args = parser.parse_args()
+    xlsx_path, rows = export_excel(args.csv_path, args.xlsx_path)
+    print(f"📄 Exported {rows} rows to {xlsx_path}")
+
+
+if __name__ == '__main__':
+    main()
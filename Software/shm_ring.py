@@ -0,0 +1,171 @@
+"""
+Shared-Memory Telemetry Ring
+- Fixed-record NumPy ring buffer in multiprocessing.shared_memory
+- One writer process, any number of reader processes, no pickling or queues
+- A 64-bit sequence counter is published after each record is written
+- Readers keep their own cursor and learn how many records they missed
+- Every record is stored twice (capacity apart), so the newest window is
+  always one contiguous zero-copy view
+
+Usage (monitor a ring from another process):
+    python shm_ring.py helion_telemetry
+"""
+import argparse
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from telemetry_store import DTYPE
+
+_MAGIC = 0x48454C31  # "HEL1"
+# Header words: magic, capacity, record size, write sequence
+_HEADER_WORDS = 4
+_SEQ = 3
+_HEADER_BYTES = _HEADER_WORDS * 8
+
+
+class SharedRing:
+    """
+    Fixed-record ring buffer in a named shared memory block
+
+    Use SharedRing.create() in the writer and SharedRing.attach() in readers.
+    """
+
+    def __init__(self, shm, dtype, owner):
+        self.shm = shm
+        self.owner = owner
+        self.dtype = np.dtype(dtype)
+        self._header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        if self._header[0] != _MAGIC or self._header[2] != self.dtype.itemsize:
+            raise ValueError(f"shared memory '{shm.name}' is not a telemetry ring of this record type")
+        self.capacity = int(self._header[1])
+        self._records = np.ndarray((2 * self.capacity,), dtype=self.dtype,
+                                   buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, name, capacity, dtype=DTYPE):
+        """Create (or replace a stale) ring for the writer process."""
+        dtype = np.dtype(dtype)
+        size = _HEADER_BYTES + 2 * capacity * dtype.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (_MAGIC, capacity, dtype.itemsize, 0)
+        del header
+        return cls(shm, dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name, dtype=DTYPE):
+        """Map an existing ring in a reader process."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            # Older versions would unlink the writer's block when this process exits
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, dtype, owner=False)
+
+    @property
+    def sequence(self):
+        """Number of records written since the ring was created."""
+        return int(self._header[_SEQ])
+
+    def write(self, row):
+        """Append one record (writer process only)."""
+        seq = int(self._header[_SEQ])
+        index = seq % self.capacity
+        self._records[index] = row
+        self._records[index + self.capacity] = row
+        # Publish only after the record is complete
+        self._header[_SEQ] = seq + 1
+
+    def window(self, count):
+        """Zero-copy view of the newest count records, oldest first."""
+        seq = self.sequence
+        count = min(count, seq, self.capacity)
+        end = seq % self.capacity
+        if end < count:
+            end += self.capacity
+        return self._records[end - count:end]
+
+    def cursor(self, from_start=False):
+        """New RingCursor positioned at the oldest kept record or at the newest."""
+        return RingCursor(self, from_start)
+
+    def close(self):
+        """Unmap; the writer also removes the block."""
+        self._header = None
+        self._records = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingCursor:
+    """Per-reader position in a SharedRing."""
+
+    def __init__(self, ring, from_start=False):
+        self.ring = ring
+        seq = ring.sequence
+        self.position = max(0, seq - ring.capacity) if from_start else seq
+        self.missed = 0
+
+    def read(self, max_records=None):
+        """
+        Copy every record written since the last call
+
+        Records the writer overwrote before they could be read are skipped
+        and counted in missed.
+
+        Returns:
+            Structured array of new records (possibly empty)
+        """
+        ring = self.ring
+        seq = ring.sequence
+        if seq - self.position > ring.capacity:
+            self.missed += seq - ring.capacity - self.position
+            self.position = seq - ring.capacity
+        count = seq - self.position
+        if max_records is not None:
+            count = min(count, max_records)
+        start = self.position % ring.capacity
+        records = ring._records[start:start + count].copy()
+        # The writer may have lapped us while copying: drop what it overwrote
+        overwritten = ring.sequence - ring.capacity - self.position
+        if overwritten > 0:
+            self.missed += min(overwritten, count)
+            records = records[overwritten:]
+        self.position += count
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor a shared-memory telemetry ring')
+    parser.add_argument('name', help='Shared memory name given to INTERPRETER.py --shm-name')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between reports')
+    args = parser.parse_args()
+
+    ring = SharedRing.attach(args.name)
+    cursor = ring.cursor()
+    print(f"Attached to '{args.name}' ({ring.capacity} records)")
+    try:
+        while True:
+            time.sleep(args.interval)
+            records = cursor.read()
+            latest = records[-1] if len(records) else None
+            print(f"{len(records) / args.interval:.1f} records/s, {cursor.missed} missed, "
+                  f"sequence {ring.sequence}, latest t={latest['timestamp'] if latest is not None else '-'}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Asyncio Task Runtime
+- Runs each firmware job as its own fixed-rate asyncio task
+- Absolute time.monotonic_ns() deadlines; missed runs are skipped, not bunched
+- Per-task timing stats: runs, overruns, start lateness, work time
+- Jobs are plain functions or async functions. A plain function holds the
+  event loop until it returns; an async job that awaits between its I/O
+  steps (one I2C chunk, one UART frame) lets the other tasks run in between
+
+Needs the asyncio and adafruit_ticks libraries from the CircuitPython bundle;
+copy this file next to code.py on the device.
+"""
+import time
+import asyncio
+
+
+class TaskStats:
+    """Timing counters of one periodic task."""
+
+    def __init__(self, name, period_ns):
+        self.name = name
+        self.period_ns = period_ns
+        self.runs = 0
+        self.overruns = 0
+        self.errors = 0
+        self.lateness_max_ns = 0
+        self.lateness_sum_ns = 0
+        self.work_max_ns = 0
+        self.work_sum_ns = 0
+
+    def record(self, lateness_ns, work_ns):
+        self.runs += 1
+        self.lateness_sum_ns += lateness_ns
+        self.work_sum_ns += work_ns
+        if lateness_ns > self.lateness_max_ns:
+            self.lateness_max_ns = lateness_ns
+        if work_ns > self.work_max_ns:
+            self.work_max_ns = work_ns
+
+    def report(self):
+        """One line summary for the serial console."""
+        runs = self.runs or 1
+        return (f"{self.name}: {self.runs} runs, {self.overruns} overruns, {self.errors} errors, "
+                f"late max {self.lateness_max_ns / 1000000:.1f} ms, "
+                f"work mean {self.work_sum_ns / runs / 1000000:.2f} / max {self.work_max_ns / 1000000:.2f} ms")
+
+
+class TaskRuntime:
+    """
+    Collection of periodic tasks run together on the asyncio event loop
+
+    Register jobs with every(), then call run() (never returns).
+    """
+
+    def __init__(self):
+        self.stats = []
+        self._jobs = []
+
+    def every(self, name, rate_hz, func):
+        """
+        Run func() rate_hz times per second in its own task
+
+        Args:
+            name: Task name used in the stats
+            rate_hz: Runs per second (may be below 1)
+            func: Plain or async function; exceptions are printed and counted,
+                not raised. The work time of an async job includes the time
+                other tasks ran while it was waiting.
+
+        Returns:
+            The task's TaskStats
+        """
+        stats = TaskStats(name, int(1000000000 / rate_hz))
+        self.stats.append(stats)
+        self._jobs.append((stats, func))
+        return stats
+
+    async def _periodic(self, stats, func):
+        period = stats.period_ns
+        next_run = time.monotonic_ns()
+        while True:
+            now = time.monotonic_ns()
+            if now < next_run:
+                await asyncio.sleep((next_run - now) / 1000000000)
+                now = time.monotonic_ns()
+            lateness = now - next_run
+            if lateness >= period:
+                # Skip the runs we missed instead of bursting to catch up
+                missed = lateness // period
+                stats.overruns += missed
+                next_run += missed * period
+                lateness -= missed * period
+            try:
+                result = func()
+                if result is not None:
+                    # async job: awaits between its I/O steps
+                    await result
+            except Exception as e:  # keep the other tasks alive
+                stats.errors += 1
+                print(f"{stats.name} task error: {e}")
+            stats.record(lateness, time.monotonic_ns() - now)
+            next_run += period
+            # Always yield, even when running late
+            await asyncio.sleep(0)
+
+    def status(self):
+        """Counters of all tasks combined, in telemetry_frame.STATUS_FIELDS order."""
+        runs = sum(s.runs for s in self.stats)
+        lateness_sum = sum(s.lateness_sum_ns for s in self.stats)
+        return [
+            time.monotonic(),
+            runs,
+            sum(s.overruns for s in self.stats),
+            max((s.lateness_max_ns for s in self.stats), default=0) / 1000000000,
+            (lateness_sum / runs if runs else 0) / 1000000000,
+            max((s.work_max_ns for s in self.stats), default=0) / 1000000000,
+        ]
+
+    def report(self):
+        """Print one line per task."""
+        for stats in self.stats:
+            print(stats.report())
+
+    async def main(self):
+        await asyncio.gather(*(asyncio.create_task(self._periodic(stats, func))
+                               for stats, func in self._jobs))
+
+    def run(self):
+        asyncio.run(self.main())
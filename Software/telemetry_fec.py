@@ -0,0 +1,264 @@
+"""
+Telemetry Forward Error Correction
+- XOR parity across groups of telemetry frames, no retransmissions needed
+- Telemetry frames go out unchanged; parity shards are sent in between them
+- Interleaving: consecutive frames belong to different groups, and each parity
+  shard is held back by `depth` frames, so losing a whole LoRa packet costs
+  every group at most one shard
+- The receiver rebuilds any group that lost one frame (lost or failed CRC)
+- Only timestamped frames (sample, summary, status) are protected; launch
+  event chunks pass through unprotected
+- Works on CircuitPython (copy this file and telemetry_frame.py to the board)
+  and CPython
+
+Parity shard layout (little endian), 36 + 2 * group_size bytes:
+    byte 0      PARITY_MAGIC (never a valid telemetry frame header)
+    byte 1      group size K
+    bytes 2-5   timestamp of the first member in ms
+    2K bytes    each member's frame type (bits 15-14) and ms after the first
+                member (bits 13-0), in transmit order
+    28 bytes    XOR of the member frames' bytes 0-27
+    2 bytes     CRC-16/CCITT-FALSE over everything before it
+
+Members are identified by (frame type, timestamp), which is unique per frame,
+so frames need no sequence numbers and a receiver without FEC simply skips
+the parity shards as noise.
+
+Airtime overhead is (36 + 2K) / (30K): 37% for K=4, 27% for K=6, 22% for K=8.
+"""
+import telemetry_frame
+
+PARITY_MAGIC = 0xC5
+MAX_GROUP_SIZE = 16
+MAX_GROUP_SPAN_MS = 0x3FFF  # Largest timestamp difference inside one group
+
+_BODY_SIZE = telemetry_frame.FRAME_SIZE - 2
+_MEMBERS_OFFSET = 6
+
+
+def parity_size(group_size):
+    """Bytes in a parity shard for groups of group_size frames"""
+    return _MEMBERS_OFFSET + 2 * group_size + _BODY_SIZE + 2
+
+
+def protected(frame):
+    """True for frames the FEC covers: non-event frames with a timestamp"""
+    return (telemetry_frame.frame_type(frame) != telemetry_frame.FRAME_EVENT
+            and not frame[1] & 0x01)
+
+
+def _timestamp_ms(frame):
+    # Field 0 of every timestamped layout, bytes 2-5
+    return frame[2] | (frame[3] << 8) | (frame[4] << 16) | (frame[5] << 24)
+
+
+def _frame_key(frame_type, timestamp_ms):
+    return (timestamp_ms << 2) | frame_type
+
+
+class ParityEncoder:
+    """
+    Builds interleaved parity shards for an outgoing frame stream
+
+    Protected frame i joins group i % depth; a group's parity shard is
+    released `depth` frames after its last member. depth should be at least
+    the number of frames that fit in one LoRa packet. Only pass frames that
+    protected() accepts.
+    """
+
+    def __init__(self, group_size=8, depth=8):
+        """
+        Args:
+            group_size: Frames per parity shard (K); larger means less overhead
+                but only one loss per K frames can be repaired
+            depth: Interleaving depth (number of groups filled in turn)
+        """
+        if not 2 <= group_size <= MAX_GROUP_SIZE:
+            raise ValueError(f"group size must be 2..{MAX_GROUP_SIZE}")
+        self.group_size = group_size
+        self.depth = max(1, depth)
+        self._xor = [bytearray(_BODY_SIZE) for _ in range(self.depth)]
+        self._members = [[] for _ in range(self.depth)]  # (type, timestamp ms)
+        self._index = 0
+        self._delayed = []  # (release index, shard)
+        self.frames = 0
+        self.parity_shards = 0
+        self.abandoned = 0  # groups dropped unfinished
+
+    def add(self, frame):
+        """
+        Account for one outgoing frame (bytes-like, FRAME_SIZE bytes)
+
+        Returns:
+            List of parity shards to send right after this frame (often empty)
+        """
+        group = self._index % self.depth
+        timestamp = _timestamp_ms(frame)
+        members = self._members[group]
+        if members and not 0 <= timestamp - members[0][1] <= MAX_GROUP_SPAN_MS:
+            # Too far from the group's first member to describe: start over
+            self.abandoned += 1
+            self._xor[group] = bytearray(_BODY_SIZE)
+            members = self._members[group] = []
+        acc = self._xor[group]
+        for i in range(_BODY_SIZE):
+            acc[i] ^= frame[i]
+        members.append((telemetry_frame.frame_type(frame), timestamp))
+        if len(members) == self.group_size:
+            self._delayed.append((self._index + self.depth, self._build(acc, members)))
+            self._xor[group] = bytearray(_BODY_SIZE)
+            self._members[group] = []
+
+        due = []
+        while self._delayed and self._delayed[0][0] <= self._index:
+            due.append(self._delayed.pop(0)[1])
+        self._index += 1
+        self.frames += 1
+        self.parity_shards += len(due)
+        return due
+
+    def _build(self, acc, members):
+        shard = bytearray(parity_size(len(members)))
+        shard[0] = PARITY_MAGIC
+        shard[1] = len(members)
+        base = members[0][1]
+        for i in range(4):
+            shard[2 + i] = (base >> (8 * i)) & 0xFF
+        pos = _MEMBERS_OFFSET
+        for frame_type, timestamp in members:
+            member = (frame_type << 14) | (timestamp - base)
+            shard[pos] = member & 0xFF
+            shard[pos + 1] = member >> 8
+            pos += 2
+        shard[pos:pos + _BODY_SIZE] = acc
+        pos += _BODY_SIZE
+        crc = telemetry_frame.crc16(shard, 0, pos)
+        shard[pos] = crc & 0xFF
+        shard[pos + 1] = crc >> 8
+        return shard
+
+
+class ParityDecoder:
+    """
+    Pulls telemetry frames and parity shards out of a byte stream and
+    rebuilds frames that were lost or corrupted
+
+    Repaired frames arrive late (when their group's parity shard does), so
+    consumers must not assume frames are in timestamp order.
+    """
+
+    def __init__(self, history=256):
+        """
+        Args:
+            history: Recent frames kept to match against parity shards
+                (must cover (group_size + 1) * depth frames)
+        """
+        self.history = history
+        self._buf = bytearray()
+        self._recent = {}  # _frame_key(type, timestamp) -> frame
+        self._order = []   # keys in arrival order, for eviction
+        self.frames = 0
+        self.recovered = 0
+        self.lost = 0
+        self.parity_shards = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def _remember(self, frame):
+        if not protected(frame):
+            return
+        key = _frame_key(telemetry_frame.frame_type(frame), _timestamp_ms(frame))
+        if key not in self._recent:
+            self._order.append(key)
+            if len(self._order) > self.history:
+                self._recent.pop(self._order.pop(0), None)
+        # After a flight computer restart the newer frame replaces the stale one
+        self._recent[key] = frame
+
+    def _repair(self, shard):
+        """Rebuild the one missing member of a parity group, if only one is missing"""
+        group_size = shard[1]
+        base = _timestamp_ms(shard)
+        xor_offset = _MEMBERS_OFFSET + 2 * group_size
+        body = bytearray(shard[xor_offset:xor_offset + _BODY_SIZE])
+        missing = []
+        for k in range(group_size):
+            pos = _MEMBERS_OFFSET + 2 * k
+            member = shard[pos] | (shard[pos + 1] << 8)
+            frame_type = member >> 14
+            timestamp = base + (member & 0x3FFF)
+            frame = self._recent.get(_frame_key(frame_type, timestamp))
+            if frame is None:
+                missing.append((frame_type, timestamp))
+                continue
+            for i in range(_BODY_SIZE):
+                body[i] ^= frame[i]
+        if not missing:
+            return None
+        if len(missing) > 1:
+            self.lost += len(missing)
+            return None
+        # The rebuilt frame must carry the missing member's type and timestamp
+        frame_type, timestamp = missing[0]
+        if (not telemetry_frame.is_header(body) or telemetry_frame.frame_type(body) != frame_type
+                or _timestamp_ms(body) != timestamp):
+            self.lost += 1
+            return None
+        crc = telemetry_frame.crc16(body)
+        frame = bytes(body) + bytes((crc & 0xFF, crc >> 8))
+        self.recovered += 1
+        self._remember(frame)
+        return frame
+
+    def feed(self, data):
+        """
+        Add received bytes
+
+        Returns:
+            List of frames (bytes, FRAME_SIZE each) in arrival order; a
+            repaired frame comes where its parity shard arrived
+        """
+        if data:
+            self._buf.extend(data)
+        buf = self._buf
+        size = telemetry_frame.FRAME_SIZE
+        frames = []
+        pos = 0
+        while len(buf) - pos >= size:
+            if buf[pos] == PARITY_MAGIC and 2 <= buf[pos + 1] <= MAX_GROUP_SIZE:
+                length = parity_size(buf[pos + 1])
+                if len(buf) - pos < length:
+                    break  # wait for the rest of the shard
+                end = pos + length - 2
+                if telemetry_frame.crc16(buf, pos, end) == buf[end] | (buf[end + 1] << 8):
+                    self.parity_shards += 1
+                    frame = self._repair(bytes(buf[pos:pos + length]))
+                    if frame is not None:
+                        frames.append(frame)
+                    pos += length
+                    continue
+            if not telemetry_frame.is_header(buf, pos):
+                pos += 1
+                self.skipped_bytes += 1
+                continue
+            if not telemetry_frame.is_valid(buf, pos):
+                self.crc_errors += 1
+                pos += 1
+                self.skipped_bytes += 1
+                continue
+            frame = bytes(buf[pos:pos + size])
+            self._remember(frame)
+            frames.append(frame)
+            self.frames += 1
+            pos += size
+        if pos:
+            self._buf = buf[pos:]
+        return frames
+
+    def report(self):
+        """One line summary of delivered, repaired and unrecoverable frames"""
+        total = self.frames + self.recovered + self.lost
+        delivered = 100.0 * (self.frames + self.recovered) / total if total else 100.0
+        return (f"FEC: {self.frames} received, {self.recovered} recovered, {self.lost} lost "
+                f"({delivered:.1f}% delivered), {self.parity_shards} parity shards, "
+                f"{self.crc_errors} CRC errors")
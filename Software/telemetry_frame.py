@@ -0,0 +1,363 @@
+"""
+Binary Telemetry Frame Codec
+- Packs one TEENSY.py sample into a fixed 30 byte frame (vs ~80-90 bytes of JSON)
+- Scaled integers, explicit null bitmap and a CRC-16 trailer
+- Works on CircuitPython (copy this file next to code.py) and CPython
+
+Frame layout (little endian):
+    byte 0      version (bits 7..4) | frame type (bits 3..2) | null bitmap bits 9..8
+    byte 1      null bitmap bits 7..0 (bit n set = field n is None)
+    bytes 2-27  field values, see FIELDS / STATUS_FIELDS / SUMMARY_FIELDS,
+                or for FRAME_EVENT an EVENT_CHUNK header and opaque payload bytes
+    bytes 28-29 CRC-16/CCITT-FALSE over bytes 0-27
+"""
+import struct
+from array import array
+
+FRAME_VERSION = 1
+
+# Frame types
+FRAME_SAMPLE = 0
+FRAME_STATUS = 1
+FRAME_SUMMARY = 2
+FRAME_EVENT = 3
+
+# (name, struct code, scale) in the same order as the TEENSY.py data_point list
+FIELDS = (
+    ("timestamp", "I", 1000),      # s -> ms
+    ("temperature", "h", 100),     # C -> 0.01 C
+    ("pressure", "H", 100),        # kPa -> 0.01 kPa
+    ("accel_x", "h", 100),         # m/s^2 -> 0.01 m/s^2
+    ("accel_y", "h", 100),
+    ("accel_z", "h", 100),
+    ("latitude", "i", 10000000),   # deg -> 1e-7 deg
+    ("longitude", "i", 10000000),
+    ("fluorometer", "H", 1),       # raw ADC counts
+    ("rel_altitude", "h", 10),     # m -> 0.1 m
+)
+
+# Flight computer health, sent every few seconds alongside the samples
+STATUS_FIELDS = (
+    ("timestamp", "I", 1000),      # s -> ms
+    ("ticks", "I", 1),             # task runs since boot (all tasks)
+    ("overruns", "I", 1),          # runs skipped because a task ran late
+    ("jitter_max", "I", 1000000),  # s -> us, worst task start lateness
+    ("jitter_mean", "I", 1000000), # s -> us
+    ("work_max", "I", 1000000),    # s -> us, longest single task run
+)
+
+# Extremes of the fast channels over one downlink interval, sent with each sample
+SUMMARY_FIELDS = (
+    ("timestamp", "I", 1000),      # s -> ms
+    ("accel_min", "h", 100),       # |a| m/s^2 -> 0.01 m/s^2
+    ("accel_max", "h", 100),
+    ("fluorometer_min", "H", 1),   # raw ADC counts
+    ("fluorometer_max", "H", 1),
+    ("imu_samples", "H", 1),       # readings aggregated into this interval
+    ("photodiode_samples", "H", 1),
+    ("bme680_samples", "H", 1),
+)
+
+_LIMITS = {
+    "I": (0, 0xFFFFFFFF),
+    "i": (-0x80000000, 0x7FFFFFFF),
+    "H": (0, 0xFFFF),
+    "h": (-0x8000, 0x7FFF),
+}
+
+def _body_format(fields):
+    return "<BB" + "".join(code for _, code, _ in fields)
+
+
+_BODY_FORMAT = _body_format(FIELDS)
+_BODY_SIZE = struct.calcsize(_BODY_FORMAT)
+FRAME_SIZE = _BODY_SIZE + 2
+
+# Every frame type shares the sample frame size; shorter layouts are zero padded
+_LAYOUTS = {
+    FRAME_SAMPLE: (FIELDS, _BODY_FORMAT),
+    FRAME_STATUS: (STATUS_FIELDS, _body_format(STATUS_FIELDS)),
+    FRAME_SUMMARY: (SUMMARY_FIELDS, _body_format(SUMMARY_FIELDS)),
+}
+for _fields, _format in _LAYOUTS.values():
+    if struct.calcsize(_format) > _BODY_SIZE or len(_fields) > 10:
+        raise ValueError("frame layout does not fit the frame size")
+
+_ZERO_BODY = bytes(_BODY_SIZE)
+
+# FRAME_EVENT frames carry one chunk of a larger binary payload (e.g. a launch
+# capture): event id, chunk index, chunk count, bytes used in this chunk
+_EVENT_FORMAT = "<BBHHHB"
+_EVENT_HEADER_SIZE = struct.calcsize(_EVENT_FORMAT)
+EVENT_PAYLOAD_SIZE = _BODY_SIZE - _EVENT_HEADER_SIZE
+
+# Header byte: version in the high nibble
+_HEADER_MASK = 0xF0
+_HEADER = FRAME_VERSION << 4
+
+
+def _make_crc_table():
+    table = array("H", [0] * 256)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table[i] = crc
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, start=0, end=None, crc=0xFFFF):
+    """Table driven CRC-16/CCITT-FALSE over data[start:end] without slicing"""
+    if end is None:
+        end = len(data)
+    table = _CRC_TABLE
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ data[i]) & 0xFF]
+    return crc
+
+
+def encode(sample, buf=None, frame_type=FRAME_SAMPLE, timestamp_ms=None):
+    """
+    Encode one sample into a binary frame
+
+    Args:
+        sample: Sequence of values in the layout order, None for missing values
+        buf: Optional preallocated bytearray of at least FRAME_SIZE bytes
+        frame_type: FRAME_SAMPLE (FIELDS), FRAME_STATUS (STATUS_FIELDS)
+            or FRAME_SUMMARY (SUMMARY_FIELDS)
+        timestamp_ms: Integer milliseconds stored in the timestamp field
+            instead of sample[0] (CircuitPython floats lose millisecond
+            resolution after about an hour of uptime)
+
+    Returns:
+        The frame as a bytearray (buf itself if one was given)
+    """
+    fields, body_format = _LAYOUTS[frame_type]
+    if len(sample) != len(fields):
+        raise ValueError(f"expected {len(fields)} values, got {len(sample)}")
+    if buf is None:
+        buf = bytearray(FRAME_SIZE)
+    else:
+        buf[:_BODY_SIZE] = _ZERO_BODY
+
+    null_mask = 0
+    values = []
+    for index, (_, code, scale) in enumerate(fields):
+        value = sample[index]
+        low, high = _LIMITS[code]
+        if index == 0 and timestamp_ms is not None:
+            # Every layout starts with the timestamp in ms
+            raw = timestamp_ms
+        elif value is None:
+            null_mask |= 1 << index
+            values.append(0)
+            continue
+        else:
+            raw = int(round(value * scale))
+        values.append(min(max(raw, low), high))
+
+    header = _HEADER | (frame_type << 2) | (null_mask >> 8)
+    struct.pack_into(body_format, buf, 0, header, null_mask & 0xFF, *values)
+    struct.pack_into("<H", buf, _BODY_SIZE, crc16(buf, 0, _BODY_SIZE))
+    return buf
+
+
+def encode_event_chunk(event_id, index, count, payload, buf=None):
+    """
+    Encode one chunk of an event payload into a FRAME_EVENT frame
+
+    Args:
+        event_id: Event number (wraps at 65536)
+        index: Chunk number, 0 to count - 1
+        count: Number of chunks the payload was split into
+        payload: Bytes-like chunk of at most EVENT_PAYLOAD_SIZE bytes
+        buf: Optional preallocated bytearray of at least FRAME_SIZE bytes
+
+    Returns:
+        The frame as a bytearray (buf itself if one was given)
+    """
+    length = len(payload)
+    if length > EVENT_PAYLOAD_SIZE:
+        raise ValueError(f"event chunk too long ({length} > {EVENT_PAYLOAD_SIZE} bytes)")
+    if buf is None:
+        buf = bytearray(FRAME_SIZE)
+    else:
+        buf[:_BODY_SIZE] = _ZERO_BODY
+    header = _HEADER | (FRAME_EVENT << 2)
+    struct.pack_into(_EVENT_FORMAT, buf, 0, header, 0, event_id & 0xFFFF, index, count, length)
+    buf[_EVENT_HEADER_SIZE:_EVENT_HEADER_SIZE + length] = payload
+    struct.pack_into("<H", buf, _BODY_SIZE, crc16(buf, 0, _BODY_SIZE))
+    return buf
+
+
+def event_chunks(payload):
+    """Number of FRAME_EVENT frames needed for payload"""
+    return max(1, (len(payload) + EVENT_PAYLOAD_SIZE - 1) // EVENT_PAYLOAD_SIZE)
+
+
+def decode_event_chunk(frame, offset=0):
+    """
+    Decode a FRAME_EVENT frame
+
+    Returns:
+        (event_id, index, count, payload bytes)
+
+    Raises:
+        ValueError: If the frame is invalid or not a FRAME_EVENT frame
+    """
+    if not is_valid(frame, offset) or frame_type(frame, offset) != FRAME_EVENT:
+        raise ValueError("invalid event frame")
+    _, _, event_id, index, count, length = struct.unpack_from(_EVENT_FORMAT, frame, offset)
+    start = offset + _EVENT_HEADER_SIZE
+    return event_id, index, count, bytes(frame[start:start + min(length, EVENT_PAYLOAD_SIZE)])
+
+
+def is_header(frame, offset=0):
+    """Cheap check that a frame of this version could start at offset"""
+    return frame[offset] & _HEADER_MASK == _HEADER
+
+
+def frame_type(frame, offset=0):
+    """Return the FRAME_* type of the frame starting at offset"""
+    return (frame[offset] >> 2) & 0x03
+
+
+def is_valid(frame, offset=0):
+    """Check the version nibble and CRC of the frame starting at offset"""
+    if len(frame) - offset < FRAME_SIZE:
+        return False
+    if not is_header(frame, offset):
+        return False
+    received = frame[offset + _BODY_SIZE] | (frame[offset + _BODY_SIZE + 1] << 8)
+    return crc16(frame, offset, offset + _BODY_SIZE) == received
+
+
+def decode(frame, offset=0):
+    """
+    Decode a binary frame back into a sample list
+
+    Args:
+        frame: Bytes-like object holding the frame
+        offset: Position of the frame inside the buffer
+
+    Returns:
+        List of values in the layout order of the frame's type (see
+        frame_type()) with None for null fields
+
+    Raises:
+        ValueError: If the version, type or CRC does not match
+    """
+    if not is_valid(frame, offset):
+        raise ValueError("invalid telemetry frame")
+    layout = _LAYOUTS.get(frame_type(frame, offset))
+    if layout is None:
+        raise ValueError("unknown telemetry frame type")
+    fields, body_format = layout
+    raw = struct.unpack_from(body_format, frame, offset)
+    null_mask = ((raw[0] & 0x03) << 8) | raw[1]
+    sample = []
+    for index, (_, _, scale) in enumerate(fields):
+        if null_mask & (1 << index):
+            sample.append(None)
+        elif scale == 1:
+            sample.append(raw[index + 2])
+        else:
+            sample.append(raw[index + 2] / scale)
+    return sample
+
+
+class FrameParser:
+    """
+    Incremental parser that pulls whole frames out of a byte stream
+
+    Bytes can be fed in arbitrary chunks; partial frames are kept until the
+    rest arrives and garbage between frames is skipped one byte at a time.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and return the list of complete, valid frames
+
+        Args:
+            data: Bytes read from the serial port or radio
+
+        Returns:
+            List of frames (bytes, FRAME_SIZE each) in arrival order
+        """
+        if data:
+            self._buf.extend(data)
+        buf = self._buf
+        frames = []
+        pos = 0
+        while len(buf) - pos >= FRAME_SIZE:
+            if not is_header(buf, pos):
+                pos += 1
+                self.skipped_bytes += 1
+                continue
+            if not is_valid(buf, pos):
+                self.crc_errors += 1
+                pos += 1
+                self.skipped_bytes += 1
+                continue
+            frames.append(bytes(buf[pos:pos + FRAME_SIZE]))
+            pos += FRAME_SIZE
+        if pos:
+            self._buf = buf[pos:]
+        self.frames += len(frames)
+        return frames
+
+
+class EventAssembler:
+    """
+    Collects FRAME_EVENT chunks until an event payload is complete
+
+    Chunks may arrive in any order; a chunk of a new event id drops any
+    incomplete previous event (counted in incomplete). Chunks whose index is
+    outside their own chunk count are ignored (counted in rejected).
+    """
+
+    def __init__(self):
+        self.event_id = None
+        self.count = 0
+        self.chunks = {}
+        self.completed = 0
+        self.incomplete = 0
+        self.rejected = 0
+
+    def feed(self, frame):
+        """
+        Add one FRAME_EVENT frame
+
+        Returns:
+            (event_id, payload bytes) once every chunk has arrived, else None
+        """
+        event_id, index, count, payload = decode_event_chunk(frame)
+        if index >= count:
+            self.rejected += 1
+            return None
+        if event_id != self.event_id or count != self.count:
+            if self.chunks:
+                self.incomplete += 1
+            self.event_id = event_id
+            self.count = count
+            self.chunks = {}
+        self.chunks[index] = payload
+        if len(self.chunks) < count:
+            return None
+        data = b"".join(self.chunks[i] for i in range(count))
+        self.chunks = {}
+        self.event_id = None
+        self.completed += 1
+        return event_id, data
@@ -0,0 +1,236 @@
+"""
+Telemetry Hub
+- Owns the ground station serial port so several host tools can run at once
+- Splits the stream once (CRC-checked telemetry frames, or text lines) and fans
+  whole messages out to any number of local TCP subscribers
+- Per-listener backpressure: drop-oldest for live plots, lossless for loggers
+- Optional JSON feed of decoded frames so new tools need no frame codec
+
+Subscribers open the hub like a serial port through pyserial's URL handlers,
+e.g. python INTERPRETER.py --port socket://localhost:7000
+
+Usage:
+    python telemetry_hub.py --port /dev/ttyACM0 --baud 9600
+    python telemetry_hub.py --port COM3 --baud 115200 --format lines
+"""
+import argparse
+import json
+import selectors
+import socket
+import time
+from collections import deque
+
+import serial
+import telemetry_frame
+
+# Backpressure policies
+DROP_OLDEST = 'drop-oldest'  # bounded queue, newest data wins (live displays)
+LOSSLESS = 'lossless'        # every message or a disconnect, never a silent gap
+
+
+class Subscriber:
+    """One connected client with its own outgoing message queue."""
+
+    def __init__(self, sock, address, policy, feed, max_queue):
+        self.sock = sock
+        self.address = address
+        self.policy = policy
+        self.feed = feed
+        self.max_queue = max(2, max_queue)
+        self.queue = deque()
+        self.offset = 0  # bytes of queue[0] already sent
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, message):
+        """
+        Queue one message
+
+        Returns:
+            False if a lossless subscriber fell too far behind and must be closed
+        """
+        if len(self.queue) >= self.max_queue:
+            if self.policy == LOSSLESS:
+                return False
+            if self.offset:
+                # The head is partly sent: keep it so the stream stays message aligned
+                del self.queue[1]
+            else:
+                self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(message)
+        return True
+
+    def flush(self):
+        """Send as much as the socket accepts without blocking."""
+        while self.queue:
+            message = self.queue[0]
+            try:
+                count = self.sock.send(memoryview(message)[self.offset:])
+            except BlockingIOError:
+                return
+            self.offset += count
+            if self.offset < len(message):
+                return
+            self.queue.popleft()
+            self.offset = 0
+            self.sent += 1
+
+
+class TelemetryHub:
+    """
+    Single producer (the serial port), many socket consumers
+
+    Listeners are (port, policy, feed) where feed is 'raw' (messages exactly as
+    received) or 'json' (decoded frames, one JSON object per line).
+    """
+
+    def __init__(self, ser, message_format='frames', max_queue=1000, lossless_max_queue=100000):
+        self.ser = ser
+        self.message_format = message_format
+        self.max_queue = max_queue
+        self.lossless_max_queue = lossless_max_queue
+        self.selector = selectors.DefaultSelector()
+        self.subscribers = []
+        self.parser = telemetry_frame.FrameParser()
+        self._line_buffer = bytearray()
+        self.messages = 0
+
+    def listen(self, port, policy, feed='raw', host='127.0.0.1'):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        server.setblocking(False)
+        self.selector.register(server, selectors.EVENT_READ, (policy, feed))
+        print(f"Listening on {host}:{port} ({feed}, {policy})")
+
+    def _accept(self, server, policy, feed):
+        sock, address = server.accept()
+        sock.setblocking(False)
+        max_queue = self.lossless_max_queue if policy == LOSSLESS else self.max_queue
+        subscriber = Subscriber(sock, address, policy, feed, max_queue)
+        self.subscribers.append(subscriber)
+        self.selector.register(sock, selectors.EVENT_READ, subscriber)
+        print(f"Subscriber {address[0]}:{address[1]} attached ({feed}, {policy})")
+
+    def _close(self, subscriber, reason):
+        self.selector.unregister(subscriber.sock)
+        subscriber.sock.close()
+        self.subscribers.remove(subscriber)
+        print(f"Subscriber {subscriber.address[0]}:{subscriber.address[1]} closed: {reason} "
+              f"({subscriber.sent} sent, {subscriber.dropped} dropped)")
+
+    def _split(self, data):
+        if self.message_format == 'frames':
+            return self.parser.feed(data)
+        self._line_buffer.extend(data)
+        messages = []
+        start = 0
+        while True:
+            end = self._line_buffer.find(b'\n', start)
+            if end < 0:
+                break
+            messages.append(bytes(self._line_buffer[start:end + 1]))
+            start = end + 1
+        if start:
+            del self._line_buffer[:start]
+        return messages
+
+    def _to_json(self, message):
+        if self.message_format != 'frames':
+            return (json.dumps({'line': message.decode('utf-8', 'replace').rstrip()}) + '\n').encode()
+        kind = telemetry_frame.frame_type(message)
+        if kind == telemetry_frame.FRAME_EVENT:
+            event_id, index, count, payload = telemetry_frame.decode_event_chunk(message)
+            record = {'type': kind, 'event_id': event_id, 'index': index, 'count': count,
+                      'payload': payload.hex()}
+        else:
+            record = {'type': kind, 'values': telemetry_frame.decode(message)}
+        return (json.dumps(record) + '\n').encode()
+
+    def publish(self, messages):
+        for message in messages:
+            encoded = None
+            for subscriber in list(self.subscribers):
+                if subscriber.feed == 'json':
+                    if encoded is None:
+                        encoded = self._to_json(message)  # decoded once for every JSON subscriber
+                    payload = encoded
+                else:
+                    payload = message
+                if not subscriber.push(payload):
+                    self._close(subscriber, "lossless queue overflow")
+        self.messages += len(messages)
+
+    def poll(self, timeout=0.0):
+        """Accept, flush and reap subscribers."""
+        for key, _ in self.selector.select(timeout):
+            if isinstance(key.data, Subscriber):
+                subscriber = key.data
+                try:
+                    if not subscriber.sock.recv(4096):
+                        self._close(subscriber, "disconnected")
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except OSError as e:
+                    self._close(subscriber, str(e))
+            else:
+                self._accept(key.fileobj, *key.data)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.flush()
+            except OSError as e:
+                self._close(subscriber, str(e))
+
+    def report(self):
+        print(f"📡 {self.messages} messages, {self.parser.crc_errors} CRC errors, "
+              f"{len(self.subscribers)} subscriber(s)")
+        for subscriber in self.subscribers:
+            print(f"   {subscriber.address[0]}:{subscriber.address[1]} {subscriber.feed}/{subscriber.policy}: "
+                  f"{subscriber.sent} sent, {len(subscriber.queue)} queued, {subscriber.dropped} dropped")
+
+    def run(self, report_interval=10.0):
+        last_report = time.monotonic()
+        while True:
+            data = self.ser.read(self.ser.in_waiting or 1)
+            if data:
+                self.publish(self._split(data))
+            self.poll()
+            now = time.monotonic()
+            if report_interval and now - last_report >= report_interval:
+                self.report()
+                last_report = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Share one telemetry serial port with several host tools')
+    parser.add_argument('--port', required=True, help='Serial port of the ground station')
+    parser.add_argument('--baud', type=int, default=9600, help='Baud rate (default: 9600)')
+    parser.add_argument('--format', choices=('frames', 'lines'), default='frames',
+                        help='frames: binary telemetry frames (GROUND.py); lines: text lines (Teensy 4.1)')
+    parser.add_argument('--latest-port', type=int, default=7000, help='Raw feed, drop-oldest (plots)')
+    parser.add_argument('--lossless-port', type=int, default=7001, help='Raw feed, lossless (loggers)')
+    parser.add_argument('--json-port', type=int, default=7002, help='Decoded JSON feed, lossless (0 = off)')
+    parser.add_argument('--max-queue', type=int, default=1000, help='Drop-oldest queue length per subscriber')
+    parser.add_argument('--report-interval', type=float, default=10.0, help='Seconds between status lines')
+    args = parser.parse_args()
+
+    # Short timeout: the hub also services its sockets between reads
+    ser = serial.Serial(args.port, args.baud, timeout=0.01)
+    hub = TelemetryHub(ser, args.format, max_queue=args.max_queue)
+    hub.listen(args.latest_port, DROP_OLDEST)
+    hub.listen(args.lossless_port, LOSSLESS)
+    if args.json_port:
+        hub.listen(args.json_port, LOSSLESS, feed='json')
+    print(f"Hub reading {args.port} at {args.baud} baud (Press Ctrl+C to stop)")
+    try:
+        hub.run(args.report_interval)
+    except KeyboardInterrupt:
+        print("Hub stopped by user")
+    finally:
+        ser.close()
+
+
+if __name__ == '__main__':
+    main()
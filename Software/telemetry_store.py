@@ -0,0 +1,69 @@
+"""
+Columnar Telemetry Store
+- Live window: preallocated NumPy structured ring buffer, zero-copy views for plotting
+- About 60 bytes per sample instead of a dict of Python floats per record
+- Fixed memory: the full session goes to disk through session_writer.py
+"""
+import numpy as np
+
+# One row per decoded sample frame, in the column order used for the Excel export
+COLUMNS = (
+    ('timestamp', 'f8'),
+    ('temperature', 'f4'),
+    ('pressure', 'f4'),
+    ('Ax', 'f4'),
+    ('Ay', 'f4'),
+    ('Az', 'f4'),
+    ('Axyz', 'f4'),
+    ('latitude', 'f8'),
+    ('longitude', 'f8'),
+    ('fluorometer', 'f4'),
+    ('rel_altitude', 'f4'),
+)
+DTYPE = np.dtype(list(COLUMNS))
+
+
+class TelemetryStore:
+    """
+    Rolling window of telemetry rows
+
+    append() takes a row in COLUMNS order. window() / columns() return views
+    of the last `window` rows without copying.
+    """
+
+    def __init__(self, window):
+        """
+        Args:
+            window: Rows kept in the live ring buffer
+        """
+        self.capacity = window
+        # Every row is written twice, capacity apart, so the window is always
+        # one contiguous slice and never needs reordering
+        self._ring = np.full(2 * window, np.nan, dtype=DTYPE)
+        self._pos = 0
+        self._count = 0
+        self.rows = 0
+
+    def append(self, row):
+        """Add one row (sequence of values in COLUMNS order)."""
+        row = tuple(row)
+        ring = self._ring
+        ring[self._pos] = row
+        ring[self._pos + self.capacity] = row
+        self._pos = (self._pos + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self.rows += 1
+
+    def __len__(self):
+        return self.rows
+
+    def window(self):
+        """Structured view of the live window, oldest row first."""
+        start = self._pos if self._count == self.capacity else 0
+        return self._ring[start:start + self._count]
+
+    def columns(self):
+        """Mapping of column name -> view of that column in the live window."""
+        window = self.window()
+        return {name: window[name] for name, _ in COLUMNS}
@@ -0,0 +1,126 @@
+"""
+Recovery tests for the XOR parity FEC (telemetry_fec.py)
+
+Run with: python -m pytest Software
+"""
+import telemetry_fec
+import telemetry_frame
+
+
+GROUP_SIZE = 8
+DEPTH = 8
+
+
+def make_frames(count, start_ms=50000, period_ms=250):
+    """Sample + summary frame pairs sharing each timestamp, as TEENSY.py sends them"""
+    frames = []
+    for i in range(count // 2):
+        timestamp_ms = start_ms + i * period_ms
+        frames.append(bytes(telemetry_frame.encode(
+            [0, 20.0 + i / 100, 101.3, 0.1, 0.2, 9.8, 49.0, -123.0, i, 5.0], timestamp_ms=timestamp_ms)))
+        frames.append(bytes(telemetry_frame.encode(
+            [0, 9.0, 11.0, 100, 900 + i, 25, 50, 4], frame_type=telemetry_frame.FRAME_SUMMARY,
+            timestamp_ms=timestamp_ms)))
+    return frames
+
+
+def transmit(frames, lost=()):
+    """Encode frames with parity and return the stream the receiver sees"""
+    encoder = telemetry_fec.ParityEncoder(GROUP_SIZE, DEPTH)
+    stream = bytearray()
+    for index, frame in enumerate(frames):
+        if index not in lost:
+            stream += frame
+        for shard in encoder.add(frame):
+            stream += shard
+    return encoder, bytes(stream)
+
+
+def receive(stream, chunk=17):
+    decoder = telemetry_fec.ParityDecoder()
+    frames = []
+    for i in range(0, len(stream), chunk):
+        frames += decoder.feed(stream[i:i + chunk])
+    return decoder, frames
+
+
+def test_parity_shard_size_and_rate():
+    # One full round fills every group; each shard is released DEPTH frames later
+    frames = make_frames(GROUP_SIZE * DEPTH + DEPTH)
+    encoder, stream = transmit(frames)
+    assert encoder.parity_shards == DEPTH
+    assert len(stream) == len(frames) * telemetry_frame.FRAME_SIZE + DEPTH * telemetry_fec.parity_size(GROUP_SIZE)
+
+
+def test_no_loss_passes_frames_through():
+    frames = make_frames(200)
+    _, stream = transmit(frames)
+    decoder, received = receive(stream)
+    assert received[:len(frames)] == frames[:len(received)]
+    assert decoder.recovered == 0
+    assert decoder.lost == 0
+
+
+def test_one_lost_member_per_group_is_recovered():
+    frames = make_frames(2 * GROUP_SIZE * DEPTH)
+    # Frame i belongs to group i % DEPTH: lose one member of every group
+    lost = {3 * DEPTH + group for group in range(DEPTH)}
+    _, stream = transmit(frames + make_frames(2 * DEPTH, start_ms=900000), lost)
+    decoder, received = receive(stream)
+
+    assert decoder.recovered == DEPTH
+    assert decoder.lost == 0
+    for index in lost:
+        assert frames[index] in received
+
+
+def test_recovered_frame_is_bit_exact_and_valid():
+    frames = make_frames(2 * GROUP_SIZE * DEPTH)
+    _, stream = transmit(frames + make_frames(2 * DEPTH, start_ms=900000), lost={5})
+    _, received = receive(stream)
+    repaired = [frame for frame in received if frame == frames[5]]
+    assert len(repaired) == 1
+    assert telemetry_frame.is_valid(repaired[0])
+
+
+def test_two_lost_members_of_one_group_are_not_recovered():
+    frames = make_frames(2 * GROUP_SIZE * DEPTH)
+    lost = {0, DEPTH}  # both in group 0
+    _, stream = transmit(frames + make_frames(2 * DEPTH, start_ms=900000), lost)
+    decoder, received = receive(stream)
+    assert decoder.recovered == 0
+    assert decoder.lost == 2
+    assert frames[0] not in received and frames[DEPTH] not in received
+
+
+def test_corrupted_frame_is_repaired_from_parity():
+    frames = make_frames(2 * GROUP_SIZE * DEPTH)
+    _, stream = transmit(frames + make_frames(2 * DEPTH, start_ms=900000))
+    stream = bytearray(stream)
+    stream[2 * telemetry_frame.FRAME_SIZE + 12] ^= 0x40  # inside frame 2
+    decoder, received = receive(bytes(stream))
+    assert decoder.crc_errors >= 1
+    assert decoder.recovered == 1
+    assert frames[2] in received
+
+
+def test_corrupted_parity_shard_is_ignored():
+    frames = make_frames(2 * GROUP_SIZE * DEPTH)
+    encoder = telemetry_fec.ParityEncoder(GROUP_SIZE, DEPTH)
+    stream = bytearray()
+    for index, frame in enumerate(frames + make_frames(2 * DEPTH, start_ms=900000)):
+        if index != 1:
+            stream += frame
+        for shard in encoder.add(frame):
+            shard[-5] ^= 0x01
+            stream += shard
+    decoder, received = receive(bytes(stream))
+    assert decoder.parity_shards == 0
+    assert decoder.recovered == 0
+    assert frames[1] not in received
+
+
+def test_event_frames_are_not_protected():
+    event = telemetry_frame.encode_event_chunk(1, 0, 1, b"payload")
+    assert not telemetry_fec.protected(event)
+    assert telemetry_fec.protected(make_frames(2)[0])
@@ -0,0 +1,111 @@
+"""
+Round-trip tests for the binary telemetry frame codec (telemetry_frame.py)
+
+Run with: python -m pytest Software
+"""
+import pytest
+
+import telemetry_frame
+
+
+SAMPLE = [12.345, 21.5, 101.32, 0.12, -0.34, 9.81, 49.2827291, -123.1207375, 812, 153.4]
+
+
+def test_sample_round_trip():
+    frame = telemetry_frame.encode(SAMPLE)
+    assert len(frame) == telemetry_frame.FRAME_SIZE
+    assert telemetry_frame.is_valid(frame)
+    assert telemetry_frame.frame_type(frame) == telemetry_frame.FRAME_SAMPLE
+    assert telemetry_frame.decode(frame) == pytest.approx(SAMPLE, abs=1e-6)
+
+
+def test_none_fields_round_trip():
+    sample = list(SAMPLE)
+    for index in (1, 6, 7, 9):  # temperature, no GPS fix, altitude
+        sample[index] = None
+    decoded = telemetry_frame.decode(telemetry_frame.encode(sample))
+    assert [value is None for value in decoded] == [value is None for value in sample]
+    assert decoded[2] == pytest.approx(sample[2])
+
+
+def test_integer_timestamp_ms():
+    frame = telemetry_frame.encode(SAMPLE, timestamp_ms=3600123)
+    assert telemetry_frame.decode(frame)[0] == pytest.approx(3600.123)
+
+
+def test_out_of_range_values_are_clamped():
+    sample = list(SAMPLE)
+    sample[1] = 1000.0  # 100000 in 0.01 C steps, beyond int16
+    assert telemetry_frame.decode(telemetry_frame.encode(sample))[1] == pytest.approx(327.67)
+
+
+@pytest.mark.parametrize("frame_type, fields", [
+    (telemetry_frame.FRAME_STATUS, telemetry_frame.STATUS_FIELDS),
+    (telemetry_frame.FRAME_SUMMARY, telemetry_frame.SUMMARY_FIELDS),
+])
+def test_other_layouts_round_trip(frame_type, fields):
+    sample = [1.5] + [index + 2 for index in range(len(fields) - 1)]
+    frame = telemetry_frame.encode(sample, frame_type=frame_type)
+    assert telemetry_frame.frame_type(frame) == frame_type
+    assert telemetry_frame.decode(frame) == pytest.approx(sample)
+
+
+def test_wrong_field_count_raises():
+    with pytest.raises(ValueError):
+        telemetry_frame.encode(SAMPLE[:-1])
+
+
+@pytest.mark.parametrize("position", [0, 1, 5, 27, 28, 29])
+def test_corrupted_frame_is_rejected(position):
+    frame = telemetry_frame.encode(SAMPLE)
+    frame[position] ^= 0x01
+    assert not telemetry_frame.is_valid(frame)
+    with pytest.raises(ValueError):
+        telemetry_frame.decode(frame)
+
+
+def test_crc16_check_value():
+    # CRC-16/CCITT-FALSE of "123456789"
+    assert telemetry_frame.crc16(b"123456789") == 0x29B1
+
+
+def test_parser_reassembles_split_frames_and_skips_garbage():
+    first = telemetry_frame.encode(SAMPLE, timestamp_ms=1000)
+    second = telemetry_frame.encode(SAMPLE, timestamp_ms=1100)
+    bad = telemetry_frame.encode(SAMPLE, timestamp_ms=1200)
+    bad[10] ^= 0xFF
+    stream = b"\x00\x42" + bytes(first) + bytes(bad) + bytes(second)
+
+    parser = telemetry_frame.FrameParser()
+    frames = []
+    for i in range(0, len(stream), 7):
+        frames += parser.feed(stream[i:i + 7])
+
+    assert frames == [bytes(first), bytes(second)]
+    assert parser.crc_errors >= 1
+    assert parser.skipped_bytes >= 2
+
+
+def test_event_chunks_reassemble_in_any_order():
+    payload = bytes(range(256)) * 2
+    count = telemetry_frame.event_chunks(payload)
+    size = telemetry_frame.EVENT_PAYLOAD_SIZE
+    frames = [
+        telemetry_frame.encode_event_chunk(7, index, count, payload[index * size:(index + 1) * size])
+        for index in range(count)
+    ]
+
+    assembler = telemetry_frame.EventAssembler()
+    results = [assembler.feed(frame) for frame in reversed(frames)]
+    assert results[:-1] == [None] * (count - 1)
+    assert results[-1] == (7, payload)
+    assert assembler.completed == 1
+
+
+def test_event_chunk_outside_its_count_is_rejected():
+    assembler = telemetry_frame.EventAssembler()
+    assert assembler.feed(telemetry_frame.encode_event_chunk(1, 2, 2, b"x")) is None
+    assert assembler.feed(telemetry_frame.encode_event_chunk(1, 0, 0, b"x")) is None
+    assert assembler.rejected == 2
+    assert assembler.feed(telemetry_frame.encode_event_chunk(1, 1, 2, b"b")) is None
+    assert assembler.feed(telemetry_frame.encode_event_chunk(1, 0, 2, b"a")) == (1, b"ab")